@@ -28,10 +28,16 @@ dep_path = os.path.join(current_dir, "dependencies", dep_folder)
 if dep_path not in sys.path:
     sys.path.insert(0, dep_path)
 
+# Pure-NumPy kernels (no bpy), importable by worker processes and benchmarks
+lib_path = os.path.join(current_dir, "lib")
+if lib_path not in sys.path:
+    sys.path.insert(0, lib_path)
+
 from bpy.props import (StringProperty, EnumProperty, FloatProperty, IntProperty,
                        FloatVectorProperty, CollectionProperty, BoolProperty, PointerProperty)
 
 from . import utils
+from . import registry
 from . import properties
 from . import ui
 from . import operators
@@ -47,6 +53,7 @@ def get_layer_items(self, context):
     return [(str(i), f"{i+1}: {item.name}", "") for i, item in enumerate(context.scene.ly_layers)]
 
 def register():
+    registry.register()
     properties.register()
     ui.register()
     operators.register()
@@ -82,8 +89,38 @@ def register():
     sc.effector_end = IntProperty(name="End", default=250)
     sc.effector_transition = IntProperty(name="Transition", default=10, min=0)
     sc.effector_influence = FloatProperty(name="Influence", min=0, max=1, default=0.5)
+    sc.effector_seed = IntProperty(
+        name="Seed", default=0, min=0,
+        description="Random seed of Sparkle and Temporal Sparkle; the same seed, drones and settings give the same pattern"
+    )
+    sc.effector_replay_shift = IntProperty(
+        name="Shift", default=0,
+        description="Frames to move a replayed schedule by"
+    )
+    sc.effector_engine = EnumProperty(
+        name="Engine",
+        items=[
+          ('NUMPY','Bulk','Schedule the whole range at once and merge keys into the curves in one pass per drone'),
+          ('PYTHON','Per Key','Reference: pick drones frame by frame and insert every key separately'),
+        ], default='NUMPY'
+    )
     sc.effector_selected_only = BoolProperty(name="Selected Only", default=False)
     sc.domain_object = PointerProperty(name="Domain Object", type=bpy.types.Object)
+    sc.domain_mode = EnumProperty(
+        name="Volume",
+        items=[
+          ('BOX','Bounding Box','World-aligned bounds of the domain object'),
+          ('MESH','Mesh Volume','Inside of the closed mesh (or curve, text), voxelized into a distance grid'),
+        ], default='BOX'
+    )
+    sc.domain_resolution = IntProperty(
+        name="Resolution", default=64, min=8, max=128,
+        description="Voxels along the longest side of a mesh volume"
+    )
+    sc.domain_falloff = FloatProperty(
+        name="Falloff", default=0.0, min=0.0, subtype='DISTANCE',
+        description="Fade the color in over this distance outside the domain instead of pulsing on entry and exit (0 = off)"
+    )
     sc.effector_duration = IntProperty(name="Duration", default=10, min=0)
 
     sc.effector_colors = CollectionProperty(type=properties.LightingModEffectorColorItem)
@@ -115,9 +152,73 @@ def register():
     sc.offset_line_start = FloatVectorProperty(name="Offset Line Start", size=3, subtype='XYZ', default=(0.0, 0.0, 0.0))
     sc.offset_line_end = FloatVectorProperty(name="Offset Line End", size=3, subtype='XYZ', default=(0.0, 0.0, 0.0))
     
+    # --- BAKE PROPS ---
+    sc.bake_engine = EnumProperty(
+        name="Engine",
+        items=[
+          ('NUMPY','NumPy','Blend whole timelines per layer with array operations'),
+          ('PROCESS','Processes','Blend drones in parallel worker processes'),
+          ('EVENTS','Keyframe Events','Evaluate only around keyframe times and refine adaptively; fastest for sparse animation'),
+          ('PYTHON','Python','Reference per-frame, per-channel blend'),
+        ], default='NUMPY'
+    )
+    sc.bake_workers = IntProperty(
+        name="Workers", default=0, min=0,
+        description="Worker processes for the Processes engine (0 = one per CPU core, 1 = serial)"
+    )
+    sc.bake_chunk_frames = IntProperty(
+        name="Chunk Frames", default=0, min=0,
+        description="NumPy engine: bake in chunks of this many frames through a disk-backed buffer, "
+                    "so memory follows the chunk size instead of the show length (0 = whole timeline)"
+    )
+    sc.bake_incremental = BoolProperty(
+        name="Incremental", default=True,
+        description="Only re-bake drones whose layer keys, initial values or layer settings changed"
+    )
+    sc.bake_compression = EnumProperty(
+        name="Compression",
+        items=[
+          ('CHANNEL','Per Channel','Compress R, G and B independently'),
+          ('JOINT','Joint RGB','Share key times across R, G and B; every channel stays within tolerance'),
+        ], default='CHANNEL'
+    )
+    sc.bake_write_profile = BoolProperty(
+        name="Write Profile", default=False,
+        description="Write per-phase bake timings and counters to <file>.bake-profile.json next to the .blend"
+    )
+    sc.bake_use_window = BoolProperty(
+        name="Frame Window", default=False,
+        description="Bake only a frame window and splice it into the existing color curves"
+    )
+    sc.bake_window_start = IntProperty(name="Window Start", default=1)
+    sc.bake_window_end = IntProperty(name="Window End", default=250)
+    sc.bake_group_only = BoolProperty(
+        name="Active Group Only", default=False,
+        description="Bake only the drones of the active formation group"
+    )
+
     # --- EXPORT PROPS ---
     sc.export_folder = StringProperty(name="Export Folder", subtype='DIR_PATH', default="//")
-    sc.export_filename = StringProperty(name="Filename", default="color_transfer", description="Name of the exported JSON file")
+    sc.export_filename = StringProperty(name="Filename", default="color_transfer", description="Name of the exported color transfer file")
+    sc.export_format = EnumProperty(
+        name="Format",
+        items=[
+          ('JSON','JSON','Color transfer as JSON text (.txt)'),
+          ('BINARY','Binary','Compact binary show file (.lmshow): delta-coded frames, byte colors, per-drone offset table'),
+        ], default='JSON'
+    )
+    sc.export_compression = EnumProperty(
+        name="Compression",
+        items=[
+          ('NONE','None','Plain JSON text (.txt)'),
+          ('GZIP','gzip','gzip-compressed JSON (.txt.gz)'),
+          ('LZMA','LZMA','LZMA-compressed JSON (.txt.xz); smallest, slowest to write'),
+        ], default='NONE'
+    )
+    sc.export_workers = IntProperty(
+        name="Threads", default=0, min=0,
+        description="Files patched in parallel by Overwrite CSV Colors (0 = automatic)"
+    )
 
     sc.drone_formations = CollectionProperty(type=properties.LightingModFormation)
     sc.drone_formations_index = IntProperty()
@@ -133,6 +234,7 @@ def unregister():
     ui.unregister()
     operators.unregister()
     properties.unregister()
+    registry.unregister()
     
     del bpy.types.Scene.ly_layers
     del bpy.types.Scene.ly_layers_index
@@ -146,8 +248,14 @@ def unregister():
     del bpy.types.Scene.effector_end
     del bpy.types.Scene.effector_transition
     del bpy.types.Scene.effector_influence
+    del bpy.types.Scene.effector_seed
+    del bpy.types.Scene.effector_replay_shift
+    del bpy.types.Scene.effector_engine
     del bpy.types.Scene.effector_selected_only
     del bpy.types.Scene.domain_object
+    del bpy.types.Scene.domain_mode
+    del bpy.types.Scene.domain_resolution
+    del bpy.types.Scene.domain_falloff
     del bpy.types.Scene.effector_duration
     del bpy.types.Scene.effector_colors
     del bpy.types.Scene.effector_colors_index
@@ -163,8 +271,22 @@ def unregister():
     del bpy.types.Scene.offset_line_start
     del bpy.types.Scene.offset_line_end
     
+    del bpy.types.Scene.bake_engine
+    del bpy.types.Scene.bake_workers
+    del bpy.types.Scene.bake_chunk_frames
+    del bpy.types.Scene.bake_incremental
+    del bpy.types.Scene.bake_compression
+    del bpy.types.Scene.bake_write_profile
+    del bpy.types.Scene.bake_use_window
+    del bpy.types.Scene.bake_window_start
+    del bpy.types.Scene.bake_window_end
+    del bpy.types.Scene.bake_group_only
+
     del bpy.types.Scene.export_folder
     del bpy.types.Scene.export_filename # <--- Cleanup
+    del bpy.types.Scene.export_format
+    del bpy.types.Scene.export_compression
+    del bpy.types.Scene.export_workers
     
     del bpy.types.Scene.drone_formations
     del bpy.types.Scene.drone_formations_index
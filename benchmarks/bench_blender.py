@@ -0,0 +1,164 @@
+"""
+End-to-end benchmark of bake_colors and the two exporters inside Blender.
+
+Builds a synthetic show (see showgen.py) as real drones, layers and
+F-Curves in an empty scene, then times each phase. Runs headless:
+    blender -b --factory-startup --python benchmarks/bench_blender.py -- \\
+        --drones 200 --frames 6000 --engines NUMPY PROCESS --json blender.json
+
+The add-on is imported from this checkout; pass --addon to enable an
+installed copy instead.
+"""
+import argparse
+import importlib
+import os
+import sys
+import tempfile
+
+import bpy
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+from showgen import add_show_arguments, make_show, show_config
+from lightingmod_core.profiling import PhaseTimer, write_profile
+
+# KeyframePoint.handle_left_type / handle_right_type enum value of 'FREE'
+HANDLE_FREE = 0
+
+def enable_addon(name):
+    if name:
+        import addon_utils
+        addon_utils.enable(name, default_set=True)
+        return importlib.import_module(name)
+    sys.path.insert(0, os.path.dirname(REPO_DIR))
+    addon = importlib.import_module(os.path.basename(REPO_DIR))
+    addon.register()
+    return addon
+
+def write_curve(action, data_path, index, curve):
+    """Creates an F-Curve from showgen keyframe arrays in bulk."""
+    fc = action.fcurves.new(data_path=data_path, index=index)
+    kps = fc.keyframe_points
+    n = len(curve['co'])
+    kps.add(n)
+    kps.foreach_set('co', curve['co'].astype(np.float32).ravel())
+    kps.foreach_set('interpolation', curve['ipo'])
+    kps.foreach_set('handle_left_type', np.full(n, HANDLE_FREE, dtype=np.int32))
+    kps.foreach_set('handle_right_type', np.full(n, HANDLE_FREE, dtype=np.int32))
+    kps.foreach_set('handle_left', curve['hl'].astype(np.float32).ravel())
+    kps.foreach_set('handle_right', curve['hr'].astype(np.float32).ravel())
+    fc.update()
+
+def build_scene(sc, show):
+    """Drones (md_sphere meshes), their md_empty targets, layers and keys."""
+    sc.frame_start = int(show['frames'][0])
+    sc.frame_end = int(show['frames'][-1])
+
+    mesh = bpy.data.meshes.new("bench_drone")
+    for i, (name, _, _) in enumerate(show['drones']):
+        o = bpy.data.objects.new(name, mesh)
+        sc.collection.objects.link(o)
+        o["md_sphere"] = f"{i + 1}S"
+        e = bpy.data.objects.new(f"{name}_empty", None)
+        sc.collection.objects.link(e)
+        e["md_empty"] = f"{i + 1}E"
+        e["drone"] = i + 1
+
+    for li, mode in enumerate(show['modes']):
+        bpy.ops.lightingmod.layer_add()
+        sc.ly_layers_index = li
+        sc.ly_layers[li].blend_mode = mode
+
+    if show['opacity_curves']:
+        sc.animation_data_create()
+        sc.animation_data.action = bpy.data.actions.new("bench_scene")
+        for li, curve in show['opacity_curves'].items():
+            write_curve(sc.animation_data.action, f"ly_layers[{li}].opacity", 0, curve)
+
+    for name, curve_map, _ in show['drones']:
+        o = bpy.data.objects[name]
+        o.animation_data_create()
+        o.animation_data.action = bpy.data.actions.new(f"{name}_layers")
+        for num, chans in curve_map.items():
+            for ch, curve in chans.items():
+                write_curve(o.animation_data.action, f'["Layer_{num}"]', ch, curve)
+
+def color_key_count(show):
+    total = 0
+    for name, _, _ in show['drones']:
+        ad = bpy.data.objects[name].animation_data
+        total += sum(len(fc.keyframe_points) for fc in ad.action.fcurves if fc.data_path == "color")
+    return total
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_show_arguments(ap)
+    ap.add_argument("--engines", nargs="+", default=["NUMPY"], choices=["NUMPY", "PROCESS", "EVENTS", "PYTHON"])
+    ap.add_argument("--compression", default="CHANNEL", choices=["CHANNEL", "JOINT"])
+    ap.add_argument("--workers", type=int, default=0, help="worker processes for the PROCESS engine")
+    ap.add_argument("--chunk", type=int, default=0, help="bake_chunk_frames for the NUMPY engine")
+    ap.add_argument("--addon", help="module name of an installed copy of the add-on")
+    args = ap.parse_args(argv)
+
+    timer = PhaseTimer()
+    addon = enable_addon(args.addon)
+    sc = bpy.context.scene
+
+    with timer.phase("generate"):
+        show = make_show(**show_config(args))
+    with timer.phase("build_scene"):
+        build_scene(sc, show)
+
+    sc.bake_compression = args.compression
+    sc.bake_workers = args.workers
+    sc.bake_chunk_frames = args.chunk
+    for engine in args.engines:
+        sc.bake_engine = engine
+        sc.bake_incremental = False
+        with timer.phase(f"bake_{engine.lower()}"):
+            bpy.ops.lightingmod.bake_colors(tolerance=args.tolerance)
+        timer.count(f"keys_{engine.lower()}", color_key_count(show))
+        if engine == 'PROCESS':
+            # A pool that fails to start bakes serially; never report that as PROCESS
+            used_pool = addon.utils.last_bake_counters.get("process_pool", False)
+            timer.count("process_pool", used_pool)
+            if not used_pool: print("WARNING: bake_process ran serially, the process pool did not start")
+
+    # A second incremental bake with nothing changed only pays for dirty tracking
+    sc.bake_incremental = True
+    with timer.phase("bake_incremental_noop"):
+        bpy.ops.lightingmod.bake_colors(tolerance=args.tolerance)
+
+    with tempfile.TemporaryDirectory() as folder:
+        blank = '\n'.join(['0\t0\t0\t0\t0\t0\t0'] * len(show['frames']))
+        for name, _, _ in show['drones']:
+            with open(os.path.join(folder, f"drone-{name}.csv"), 'w') as f: f.write(blank)
+        sc.export_folder = folder
+        sc.export_filename = "color_transfer"
+
+        with timer.phase("export_csv"):
+            bpy.ops.lightingmod.export_csv_colors()
+
+        for o in sc.objects: o.select_set("md_empty" in o)
+        with timer.phase("export_color_transfer"):
+            bpy.ops.lightingmod.export_color_transfer()
+        timer.count("color_transfer_bytes", os.path.getsize(os.path.join(folder, "color_transfer.txt")))
+
+    n_samples = len(show['drones']) * len(show['frames']) * 3
+    timer.count("drones", len(show['drones']))
+    timer.count("samples", n_samples)
+
+    print(f"{len(show['drones'])} drones x {len(show['frames'])} frames x {len(show['modes'])} layers")
+    timer.report()
+    if args.json:
+        config = {**show_config(args), 'engines': args.engines, 'compression': args.compression,
+                  'workers': args.workers, 'chunk': args.chunk}
+        write_profile(args.json, "blender", config, timer, blender=bpy.app.version_string,
+                      addon=".".join(map(str, addon.bl_info["version"])))
+        print(f"Results written to {args.json}")
+
+if __name__ == "__main__":
+    main()
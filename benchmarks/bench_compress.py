@@ -0,0 +1,69 @@
+"""
+Keyframe compression benchmark: recursive two-pass RDP vs simplify_channels.
+
+Runs without Blender:
+    python benchmarks/bench_compress.py --frames 12000 --drones 50
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lib"))
+from lightingmod_core import compress
+
+def synthetic_drone(rng, n):
+    """Baked-looking RGB: slow fades, strobes, random walk, long flat holds."""
+    t = np.arange(n)
+    fade = np.sin(t / rng.uniform(50, 400)) * 0.5 + 0.5
+    strobe = ((t // rng.integers(5, 60)) % 2).astype(np.float64)
+    walk = np.clip(np.cumsum(rng.normal(0, 0.01, n)) + 0.5, 0, 1)
+    hold = np.repeat(rng.random(n // 500 + 1), 500)[:n]
+    cols = np.stack([fade, strobe, walk, hold], axis=1)[:, rng.permutation(4)[:3]]
+    # Quantize like the bake does (0-255 ints back to 0-1)
+    return (cols * 255).astype(np.int64).astype(np.float32) / 255.0
+
+def max_error(keys, frames, values):
+    return float(np.abs(np.interp(frames, keys[:, 0], keys[:, 1]) - values).max())
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--frames", type=int, default=12000)
+    ap.add_argument("--drones", type=int, default=50)
+    ap.add_argument("--tolerance", type=float, default=0.02)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    frames = np.arange(1, args.frames + 1, dtype=np.float32)
+    drones = [synthetic_drone(rng, args.frames) for _ in range(args.drones)]
+
+    t0 = time.perf_counter()
+    legacy, failures = [], 0
+    for cols in drones:
+        try:
+            legacy.append([compress.two_pass_simplify(frames, cols[:, c], args.tolerance) for c in range(3)])
+        except RecursionError:
+            legacy.append(None); failures += 1
+    t_legacy = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    new = [compress.simplify_channels(frames, cols, args.tolerance) for cols in drones]
+    t_new = time.perf_counter() - t0
+
+    keys_in = args.drones * args.frames * 3
+    keys_legacy = sum(len(k) for d in legacy if d for k in d)
+    keys_new = sum(len(k) for d in new for k in d)
+    err = max(max_error(d[c], frames, cols[:, c]) for d, cols in zip(new, drones) for c in range(3))
+    same = all(d_old is None or all(np.array_equal(a[:, 0], b[:, 0]) for a, b in zip(d_old, d_new))
+               for d_old, d_new in zip(legacy, new))
+
+    print(f"{args.drones} drones x {args.frames} frames x 3 channels ({keys_in} samples)")
+    print(f"  recursive two-pass : {t_legacy:8.3f} s  {keys_legacy:9d} keys  {failures} recursion failures")
+    print(f"  simplify_channels  : {t_new:8.3f} s  {keys_new:9d} keys  max error {err:.5f}")
+    print(f"  speed-up {t_legacy / max(t_new, 1e-9):.1f}x, identical key times: {same}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Bake, compression and export benchmark of the pure-NumPy kernels.
+
+Runs without Blender, on a synthetic show (see showgen.py):
+    python benchmarks/bench_kernels.py --drones 200 --frames 6000 --json kernels.json
+
+The export phases write the same text the CSV and color transfer
+exporters produce, from arrays instead of Blender objects, into a
+temporary folder; export_csv_unchanged repeats the CSV patch on files
+that already match. stream_compress and store_save also check their
+results against the in-memory reference.
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from showgen import add_show_arguments, make_show, show_config
+from lightingmod_core.profiling import PhaseTimer, write_profile
+from lightingmod_core import blend, compress, csvpatch, events, fcurve, showfile, stack, store, transfer
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_show_arguments(ap)
+    ap.add_argument("--chunk", type=int, default=1000, help="chunk size of the streaming compressor")
+    ap.add_argument("--skip-legacy", action="store_true",
+                    help="skip find_critical_indices / recursive rdp_simplify")
+    args = ap.parse_args()
+
+    timer = PhaseTimer()
+    with timer.phase("generate"):
+        show = make_show(**show_config(args))
+    frames, modes, enabled = show['frames'], show['modes'], show['enabled']
+    frames32 = frames.astype(np.float32)
+    n = len(show['drones'])
+
+    samples, colors = [], []
+    with timer.phase("sample"):
+        for _, curve_map, initials in show['drones']:
+            samples.append(fcurve.sample_layer_stack(curve_map, initials, frames, enabled))
+    with timer.phase("blend"):
+        blended = [blend.blend_stack(s, show['opacities'], modes, enabled) for s in samples]
+    del samples
+    with timer.phase("quantize"):
+        colors = [blend.to_bytes(rgb) for rgb in blended]
+    del blended
+    values = [c.astype(np.float32) / 255.0 for c in colors]
+
+    with timer.phase("bake_compiled"):
+        plan = stack.compile_layers(show['opacities'], modes, enabled)
+        compiled = [blend.to_bytes(stack.bake_drone(plan, curve_map, initials, frames))
+                    for _, curve_map, initials in show['drones']]
+    timer.count("compiled_matches", all(np.array_equal(a, b) for a, b in zip(colors, compiled)))
+    del compiled
+
+    with timer.phase("bake_events"):
+        breaks = events.scene_breakpoints(show['opacity_curves'], show['opacities'], frames)
+        evaluated, error = 0, 0.0
+        for (_, curve_map, initials), v in zip(show['drones'], values):
+            keys, n_eval = events.bake_drone_keys(curve_map, initials, frames, show['opacities'],
+                                                  modes, enabled, breaks, args.tolerance)
+            evaluated += n_eval
+            error = max(error, float(np.abs(compress.expand_keys(keys, frames) - v).max()))
+    timer.count("events_evaluated", evaluated)
+    timer.count("events_max_error", round(error, 6))
+
+    if not args.skip_legacy:
+        with timer.phase("find_critical_indices"):
+            for v in values:
+                for c in range(3): compress.find_critical_indices(v[:, c])
+        failures = 0
+        with timer.phase("rdp_simplify"):
+            for v in values:
+                for c in range(3):
+                    try: compress.two_pass_simplify(frames32, v[:, c], args.tolerance)
+                    except RecursionError: failures += 1
+        timer.count("rdp_simplify_recursion_failures", failures)
+
+    with timer.phase("simplify_channels"):
+        channel_keys = [compress.simplify_channels(frames32, v, args.tolerance) for v in values]
+    with timer.phase("simplify_rgb"):
+        joint_keys = [compress.simplify_rgb(frames32, v, args.tolerance) for v in values]
+    streamed = []
+    with timer.phase("stream_compress"):
+        for v in values:
+            sc = compress.StreamCompressor(args.tolerance)
+            for c0 in range(0, len(frames), args.chunk):
+                sc.push(frames32[c0:c0 + args.chunk], v[c0:c0 + args.chunk], c0 + args.chunk >= len(frames))
+            streamed.append(sc.finish())
+    stream_matches = all(len(a) == len(b) and all(np.array_equal(x, y) for x, y in zip(a, b))
+                         for a, b in zip(streamed, channel_keys))
+    timer.count("stream_matches", stream_matches)
+    assert stream_matches, "chunked keys differ from simplify_channels"
+    del streamed
+
+    with tempfile.TemporaryDirectory() as folder:
+        blank = '\n'.join(['0\t0\t0\t0\t0\t0\t0'] * len(frames))
+        for name, _, _ in show['drones']:
+            with open(os.path.join(folder, f"drone-{name}.csv"), 'w') as f: f.write(blank)
+        with timer.phase("export_csv"):
+            for (name, _, _), rgb in zip(show['drones'], colors):
+                csvpatch.patch_file(os.path.join(folder, f"drone-{name}.csv"), rgb)
+        with timer.phase("export_csv_unchanged"):
+            for (name, _, _), rgb in zip(show['drones'], colors):
+                csvpatch.patch_file(os.path.join(folder, f"drone-{name}.csv"), rgb)
+        with timer.phase("export_color_transfer"):
+            with transfer.TransferWriter(os.path.join(folder, "color_transfer.txt")) as w:
+                for i, keys in enumerate(channel_keys):
+                    times = np.unique(np.concatenate([k[:, 0] for k in keys])).astype(np.int64)
+                    w.add(str(i + 1), times, np.stack([np.interp(times, k[:, 0], k[:, 1]) for k in keys], axis=1))
+        with timer.phase("export_binary"):
+            with showfile.ShowWriter(os.path.join(folder, "show" + showfile.EXTENSION)) as w:
+                for i, keys in enumerate(channel_keys):
+                    times = np.unique(np.concatenate([k[:, 0] for k in keys])).astype(np.int64)
+                    w.add(str(i + 1), times, np.stack([np.interp(times, k[:, 0], k[:, 1]) for k in keys], axis=1))
+        timer.count("color_transfer_bytes", os.path.getsize(os.path.join(folder, "color_transfer.txt")))
+        timer.count("binary_bytes", os.path.getsize(os.path.join(folder, "show" + showfile.EXTENSION)))
+
+        # Incremental bakes delete removed drones before saving; lookups must survive the compaction
+        with timer.phase("store_save"):
+            cache = store.BakedColorStore()
+            cache.clear(int(frames[0]), len(frames))
+            for (name, _, _), rgb in zip(show['drones'], colors): cache[name] = rgb
+            del cache[show['drones'][0][0]]
+            path = os.path.join(folder, "baked.npy")
+            cache.save(path, "bench")
+        reloaded = store.BakedColorStore()
+        reloaded.load(path, "bench")
+        store_matches = all(np.array_equal(c[name], rgb) for c in (cache, reloaded)
+                            for (name, _, _), rgb in zip(show['drones'][1:], colors[1:]))
+        timer.count("store_matches", store_matches and len(cache) == len(reloaded) == n - 1)
+        assert store_matches, "baked colors changed rows across save()"
+        del cache, reloaded
+
+    samples_in = n * len(frames) * 3
+    keys_channel = sum(len(k) for d in channel_keys for k in d)
+    keys_joint = sum(len(d[0]) for d in joint_keys)
+    timer.count("drones", n)
+    timer.count("samples", samples_in)
+    timer.count("keys_channel", keys_channel)
+    timer.count("keys_joint", keys_joint * 3)
+    timer.count("ratio_channel", round(samples_in / max(1, keys_channel), 2))
+    timer.count("ratio_joint", round(samples_in / max(1, keys_joint * 3), 2))
+
+    print(f"{n} drones x {len(frames)} frames x {len(modes)} layers ({samples_in} samples)")
+    timer.report()
+    if args.json:
+        write_profile(args.json, "kernels", {**show_config(args), 'chunk': args.chunk}, timer)
+        print(f"Results written to {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Compares two benchmark result files phase by phase.
+
+    python benchmarks/compare.py baseline.json candidate.json --threshold 1.10
+
+Exits with status 1 if any phase got slower than the threshold ratio.
+"""
+import argparse
+import json
+import sys
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("baseline")
+    ap.add_argument("candidate")
+    ap.add_argument("--threshold", type=float, default=1.10, help="slow-down ratio reported as a regression")
+    args = ap.parse_args()
+
+    with open(args.baseline) as f: old = json.load(f)
+    with open(args.candidate) as f: new = json.load(f)
+    if old.get("config") != new.get("config"):
+        print("warning: the runs used different configurations")
+
+    regressions = []
+    names = list(old["phases"]) + [n for n in new["phases"] if n not in old["phases"]]
+    width = max(len(n) for n in names)
+    print(f"{'phase':<{width}}  {'baseline':>10}  {'candidate':>10}  {'ratio':>6}")
+    for name in names:
+        a, b = old["phases"].get(name), new["phases"].get(name)
+        if a is None or b is None:
+            cells = [f"{v:10.4f}" if v is not None else f"{'-':>10}" for v in (a, b)]
+            print(f"{name:<{width}}  {cells[0]}  {cells[1]}")
+            continue
+        ratio = b / a if a > 0 else float('inf')
+        flag = "  <-- slower" if ratio > args.threshold else ""
+        if flag: regressions.append(name)
+        print(f"{name:<{width}}  {a:10.4f}  {b:10.4f}  {ratio:6.2f}{flag}")
+
+    for name in sorted(set(old["counters"]) & set(new["counters"])):
+        if old["counters"][name] != new["counters"][name]:
+            print(f"counter {name}: {old['counters'][name]} -> {new['counters'][name]}")
+    sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Synthetic show generator shared by the benchmarks.
+
+A show is plain arrays in the same layout the bake exports from Blender
+(see operators/baking.export_layer_curves), so it feeds the
+lightingmod_core kernels directly and bench_blender.py can turn it into
+a real scene.
+"""
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lib"))
+from lightingmod_core import fcurve
+
+BLEND_MODES = ('REPLACE', 'ADD', 'SUBTRACT', 'MULTIPLY', 'LIGHTEN', 'DARKEN', 'SCREEN')
+
+def random_curve(rng, frame_start, n_frames, n_keys, lo=0.0, hi=1.0, ipo=None):
+    """
+    Keyframe arrays {'co', 'hl', 'hr', 'ipo'} with n_keys keys spread over
+    the frame range. Interpolation is mixed CONSTANT/LINEAR/BEZIER unless
+    `ipo` fixes it; handles sit a third of the way to the neighbours.
+    """
+    n_keys = max(1, min(n_keys, n_frames))
+    xs = np.sort(rng.choice(n_frames, n_keys, replace=False)).astype(np.float64) + frame_start
+    ys = rng.uniform(lo, hi, n_keys)
+    co = np.stack([xs, ys], axis=1)
+
+    gap_l = np.diff(xs, prepend=xs[0] - 1.0) / 3.0
+    gap_r = np.diff(xs, append=xs[-1] + 1.0) / 3.0
+    hl = np.stack([xs - gap_l, ys], axis=1)
+    hr = np.stack([xs + gap_r, ys], axis=1)
+
+    if ipo is None:
+        codes = rng.choice([fcurve.CONSTANT, fcurve.LINEAR, fcurve.BEZIER], n_keys, p=[0.2, 0.4, 0.4])
+    else:
+        codes = np.full(n_keys, ipo)
+    return {'co': co, 'hl': hl, 'hr': hr, 'ipo': codes.astype(np.int32)}
+
+def make_show(drones=100, layers=3, frames=2400, key_density=2.0, modes=None,
+              animated_opacity=True, static_layers=0.0, frame_start=1, seed=0):
+    """
+    Builds a synthetic show.
+
+    drones       : number of drones
+    layers       : layers per drone (Layer_1 is the base)
+    frames       : timeline length
+    key_density  : keys per 100 frames on every layer channel
+    modes        : blend mode per layer (cycled through BLEND_MODES if None)
+    animated_opacity : keyframe the opacity of every layer above the base
+    static_layers : share of drone layers left unkeyed (constant colors)
+
+    Returns a dict with 'frames', 'modes', 'enabled', 'opacity_curves'
+    ({layer_index: curve}), 'opacities' ((frames, layers) sampled) and
+    'drones', a list of (name, curve_map, initials) tuples.
+    """
+    rng = np.random.default_rng(seed)
+    if modes is None:
+        modes = ['REPLACE'] + [BLEND_MODES[i % len(BLEND_MODES)] for i in range(layers - 1)]
+    modes = list(modes)[:layers]
+    frame_arr = np.arange(frame_start, frame_start + frames, dtype=np.float64)
+    n_keys = max(1, int(round(frames * key_density / 100.0)))
+
+    opacity_curves = {}
+    if animated_opacity:
+        for li in range(1, layers):
+            opacity_curves[li] = random_curve(rng, frame_start, frames, max(2, n_keys // 4), ipo=fcurve.BEZIER)
+    opacities = np.ones((frames, layers), dtype=np.float64)
+    for li, curve in opacity_curves.items():
+        opacities[:, li] = fcurve.evaluate(curve, frame_arr)
+
+    show_drones = []
+    for d in range(drones):
+        curve_map = {num: {ch: random_curve(rng, frame_start, frames, n_keys) for ch in range(3)}
+                     for num in range(1, layers + 1) if rng.random() >= static_layers}
+        initials = {num: [0.5, 0.5, 0.5] for num in range(1, layers + 1)}
+        show_drones.append((f"Drone_{d:05d}", curve_map, initials))
+
+    return {'frames': frame_arr, 'modes': modes, 'enabled': [True] * layers,
+            'opacity_curves': opacity_curves, 'opacities': opacities, 'drones': show_drones}
+
+def show_config(args):
+    """The make_show() keyword arguments of a parsed argparse namespace."""
+    return {'drones': args.drones, 'layers': args.layers, 'frames': args.frames,
+            'key_density': args.key_density, 'modes': args.modes,
+            'animated_opacity': not args.static_opacity, 'static_layers': args.static_layers,
+            'seed': args.seed}
+
+def add_show_arguments(ap):
+    """Command line options for make_show(), shared by every benchmark."""
+    ap.add_argument("--drones", type=int, default=100)
+    ap.add_argument("--layers", type=int, default=3)
+    ap.add_argument("--frames", type=int, default=2400)
+    ap.add_argument("--key-density", type=float, default=2.0, help="keys per 100 frames per channel")
+    ap.add_argument("--modes", nargs="+", choices=BLEND_MODES, default=None,
+                    help="blend mode per layer (default: cycle through all modes)")
+    ap.add_argument("--static-opacity", action="store_true", help="do not animate layer opacities")
+    ap.add_argument("--static-layers", type=float, default=0.0, help="share of drone layers left unkeyed")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--tolerance", type=float, default=0.02)
+    ap.add_argument("--json", metavar="PATH", help="write machine-readable results to PATH")
@@ -0,0 +1,6 @@
+"""
+Pure-NumPy kernels for the Advanced Lighting add-on.
+
+Nothing in this package imports bpy, so it can be loaded by worker
+processes and benchmark scripts running outside Blender.
+"""
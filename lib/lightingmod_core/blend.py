@@ -0,0 +1,59 @@
+import numpy as np
+
+# Matches utils.blend_colors: layers below this opacity are skipped entirely
+OPACITY_EPSILON = 0.0001
+
+def blend_arrays(base, top, mode, fac):
+    """
+    Vectorized utils.blend_colors.
+    base/top are (..., 3) float arrays, fac broadcasts against them.
+    """
+    if   mode == 'ADD':      out = np.minimum(1.0, base + top)
+    elif mode == 'SUBTRACT': out = np.maximum(0.0, base - top)
+    elif mode == 'MULTIPLY': out = base * top
+    elif mode == 'LIGHTEN':  out = np.maximum(base, top)
+    elif mode == 'DARKEN':   out = np.minimum(base, top)
+    elif mode == 'SCREEN':   out = 1 - (1 - base) * (1 - top)
+    else:                    out = top
+    return base * (1 - fac) + out * fac
+
+def layer_enabled_mask(mutes, solos):
+    """Per-layer enabled flags using the same solo/mute rule as refresh_layer_enable."""
+    any_solo = any(solos)
+    return [(not m) and (s or not any_solo) for m, s in zip(mutes, solos)]
+
+def blend_stack(layers, opacities, modes, enabled):
+    """
+    Composites a whole layer stack in one pass.
+
+    layers    : (frames, n_layers, 3) sampled layer colors
+    opacities : (frames, n_layers) layer influence per frame
+    modes     : blend mode per layer (keys of utils.BLEND_MAP)
+    enabled   : solo/mute result per layer
+
+    Returns a (frames, 3) float64 array. The base layer ignores its own
+    opacity; every other layer is skipped where opacity <= OPACITY_EPSILON.
+    """
+    n_frames = layers.shape[0]
+    if enabled[0]:
+        base = np.array(layers[:, 0, :], dtype=np.float64)
+    else:
+        base = np.zeros((n_frames, 3), dtype=np.float64)
+
+    for li in range(1, layers.shape[1]):
+        if not enabled[li]: continue
+        fac = np.asarray(opacities[:, li], dtype=np.float64)
+        active = fac > OPACITY_EPSILON
+        if not active.any(): continue
+
+        blended = blend_arrays(base, layers[:, li, :], modes[li], fac[:, None])
+        base = np.where(active[:, None], blended, base)
+    return base
+
+def quantize(colors):
+    """Float 0-1 colors to 0-255 ints, truncating like int(c * 255)."""
+    return (np.asarray(colors, dtype=np.float64) * 255).astype(np.int64)
+
+def to_bytes(colors):
+    """quantize() clipped into the 0-255 uint8 range used by the baked color store."""
+    return np.clip(quantize(colors), 0, 255).astype(np.uint8)
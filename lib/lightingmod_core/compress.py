@@ -0,0 +1,267 @@
+import numpy as np
+
+# --- Critical Points (Peaks, Valleys, Plateaus) ---
+def find_critical_indices(values):
+    """
+    Identifies indices where the direction of change flips (slope sign change).
+    These points are mandatory to preserve strobe timing and intensity.
+    """
+    n = len(values)
+    if n < 3:
+        return np.arange(n) # Keep all if too small
+
+    # Calculate differences between consecutive frames
+    diffs = np.diff(values) # Length n-1
+    
+    # Get signs (-1, 0, 1). 
+    signs = np.sign(diffs)
+    
+    # Where does the sign change? 
+    sign_change = signs[:-1] != signs[1:]
+    
+    # Get indices. Shift +1 because diff index i describes interval (i, i+1)
+    turning_points = np.where(sign_change)[0] + 1
+    
+    # Always include Start (0) and End (n-1)
+    critical = np.concatenate(([0], turning_points, [n-1]))
+    return np.unique(critical)
+
+# --- Recursive RDP (reference implementation, kept for benchmarks) ---
+def rdp_simplify(frames, values, epsilon):
+    """
+    Reduces points using Ramer-Douglas-Peucker with Vertical Distance error.
+    Superseded by simplify_channels; recursion depth grows with the segment.
+    """
+    points = np.column_stack((frames, values))
+    
+    if len(points) < 3:
+        return points
+
+    start = points[0]
+    end = points[-1]
+    
+    dx = end[0] - start[0]
+    if dx == 0:
+        dists = np.zeros(len(points))
+    else:
+        # Line Eq: y = mx + c
+        m = (end[1] - start[1]) / dx
+        c = start[1] - m * start[0]
+        
+        # Expected Y vs Actual Y
+        expected_y = m * points[:, 0] + c
+        dists = np.abs(points[:, 1] - expected_y)
+
+    dmax = dists.max()
+    index = dists.argmax()
+
+    if dmax > epsilon:
+        res1 = rdp_simplify(frames[:index+1], values[:index+1], epsilon)
+        res2 = rdp_simplify(frames[index:],   values[index:],   epsilon)
+        return np.vstack((res1[:-1], res2))
+    else:
+        return np.array([start, end])
+
+def two_pass_simplify(frames, values, epsilon):
+    """Per-channel reference pipeline: critical points, then recursive RDP between them."""
+    critical_idx = find_critical_indices(values)
+    segments = []
+    for k in range(len(critical_idx) - 1):
+        a, b = critical_idx[k], critical_idx[k+1]
+        seg = rdp_simplify(frames[a:b+1], values[a:b+1], epsilon)
+        segments.append(seg[1:] if k > 0 else seg)
+    if segments:
+        return np.vstack(segments)
+    return np.column_stack((frames, values))
+
+# --- Level-Synchronous RDP ---
+def critical_mask(values):
+    """
+    find_critical_indices for every column of a (n, C) array at once.
+    Returns a (n, C) bool mask.
+    """
+    n = len(values)
+    mask = np.zeros(values.shape, dtype=bool)
+    if n < 3:
+        mask[:] = True
+        return mask
+    signs = np.sign(np.diff(values, axis=0))
+    mask[1:-1] = signs[:-1] != signs[1:]
+    mask[0] = mask[-1] = True
+    return mask
+
+def rdp_mask(x, y, keep, epsilon):
+    """
+    Refines `keep` (bool, same length as x) with Ramer-Douglas-Peucker using
+    vertical distance. Every run between two kept points is one segment;
+    all open segments are split in the same pass, so there is no recursion
+    and each pass is a handful of whole-array operations. Every dropped
+    point stays within epsilon of the kept polyline, as with recursive
+    RDP; the kept points themselves may differ where distances tie within
+    floating-point rounding.
+
+    y may be (N,) or (N, C); with C columns the error of a point is the
+    largest vertical error across its columns (shared split points).
+    """
+    y2 = y if y.ndim == 2 else y[:, None]
+    kept = np.flatnonzero(keep)
+    starts, ends = kept[:-1], kept[1:]
+    open_ = ends - starts > 1
+    starts, ends = starts[open_], ends[open_]
+
+    while len(starts):
+        counts = ends - starts - 1
+        offsets = np.cumsum(counts) - counts
+        seg = np.repeat(np.arange(len(starts)), counts)
+        idx = starts[seg] + 1 + (np.arange(counts.sum()) - offsets[seg])
+
+        x0, x1 = x[starts], x[ends]
+        dx = x1 - x0
+        slope = (y2[ends] - y2[starts]) / np.where(dx != 0, dx, 1.0)[:, None]
+        slope[dx == 0] = 0.0
+        expected = y2[starts][seg] + slope[seg] * (x[idx] - x0[seg])[:, None]
+        dists = np.abs(y2[idx] - expected).max(axis=1)
+        dists[dx[seg] == 0] = 0.0
+
+        # Per-segment max and its first index
+        dmax = np.maximum.reduceat(dists, offsets)
+        at_max = dists == dmax[seg]
+        split_at = np.minimum.reduceat(np.where(at_max, idx, len(x)), offsets)
+
+        split = dmax > epsilon
+        new = split_at[split]
+        keep[new] = True
+        starts = np.concatenate((starts[split], new))
+        ends = np.concatenate((new, ends[split]))
+        open_ = ends - starts > 1
+        starts, ends = starts[open_], ends[open_]
+    return keep
+
+def simplify_channels(frames, values, epsilon):
+    """
+    Two-pass compression of every channel of a drone in one call: critical
+    points (slope sign changes) are always kept, then RDP runs on the
+    segments between them. Same vertical-error bound as two_pass_simplify.
+
+    frames : (n,) key times
+    values : (n,) or (n, C) channel values
+    Returns a list of C (k, 2) [frame, value] arrays.
+    """
+    frames = np.asarray(frames, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 1: values = values[:, None]
+    n, n_ch = values.shape
+    if epsilon <= 0.0 or n < 3:
+        return [np.column_stack((frames, values[:, c])) for c in range(n_ch)]
+
+    # Channels laid end to end; each keeps its own first and last frame,
+    # so no segment ever spans two channels
+    keep = critical_mask(values).T.reshape(-1)
+    flat = values.T.reshape(-1)
+    keep = rdp_mask(np.tile(frames, n_ch), flat, keep, epsilon).reshape(n_ch, n)
+    return [np.column_stack((frames[keep[c]], values[keep[c], c])) for c in range(n_ch)]
+
+def simplify_rgb(frames, values, epsilon):
+    """
+    Compresses the channels as one polyline so they share key times.
+    A frame is kept if it is critical in any channel, and RDP measures the
+    error of a point as its largest vertical error over the channels
+    (max-norm), so every channel individually stays within epsilon.
+    Returns a list of C (k, 2) arrays with identical frame columns.
+    """
+    frames = np.asarray(frames, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 1: values = values[:, None]
+    n, n_ch = values.shape
+    if epsilon <= 0.0 or n < 3:
+        keep = np.ones(n, dtype=bool)
+    else:
+        keep = rdp_mask(frames, values, critical_mask(values).any(axis=1), epsilon)
+    return [np.column_stack((frames[keep], values[keep, c])) for c in range(n_ch)]
+
+def expand_keys(channel_keys, frames):
+    """(n, C) values of linearly interpolated channel keys at `frames`."""
+    frames = np.asarray(frames, dtype=np.float64)
+    return np.stack([np.interp(frames, k[:, 0], k[:, 1]) for k in channel_keys], axis=1)
+
+# --- Streaming (chunked) compression ---
+class StreamCompressor:
+    """
+    simplify_channels / simplify_rgb over a timeline fed in consecutive
+    frame chunks, for bakes that never hold a full timeline in memory.
+
+    Everything up to the last critical point seen so far is final, since
+    RDP never looks past the next critical point. The samples after it
+    are carried into the next chunk, which also gives that critical point
+    the look-ahead sample it needs at a chunk boundary. A carry longer
+    than max_carry (a monotone run spanning many chunks) is closed with
+    an extra key; that only adds keys and never loosens the error bound.
+    """
+    def __init__(self, epsilon, joint=False, max_carry=65536):
+        self.epsilon = epsilon
+        self.joint = joint
+        self.max_carry = max_carry
+        self._lanes = None
+
+    def _run(self, lane, frames, values, final):
+        keys = lane['keys']
+        if lane['frames'] is not None:
+            frames = np.concatenate((lane['frames'], frames))
+            values = np.concatenate((lane['values'], values))
+        n = len(frames)
+        v2 = values if values.ndim == 2 else values[:, None]
+        if self.epsilon <= 0.0:
+            keys.append((frames, v2))
+            lane['frames'] = lane['values'] = None
+            return
+
+        mask = critical_mask(v2).any(axis=1)
+        if final:
+            cut = n - 1
+        else:
+            # The last sample is only an end point, not a confirmed critical one
+            interior = np.flatnonzero(mask[1:-1]) + 1
+            if len(interior): cut = interior[-1]
+            elif n > self.max_carry: cut = n - 1
+            else:
+                lane['frames'], lane['values'] = frames, values
+                return
+            mask[cut + 1:] = False
+
+        keep = rdp_mask(frames[:cut + 1], v2[:cut + 1], mask[:cut + 1], self.epsilon)
+        # The cut point opens the next piece, so it is emitted only at the end
+        if not final: keep = keep[:-1]
+        keys.append((frames[:len(keep)][keep], v2[:len(keep)][keep]))
+        # After the final chunk nothing is left to carry into finish()
+        if final: lane['frames'] = lane['values'] = None
+        else: lane['frames'], lane['values'] = frames[cut:], values[cut:]
+
+    def push(self, frames, values, final=False):
+        """Feeds the next chunk: frames (n,), values (n, C)."""
+        frames = np.asarray(frames, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64)
+        if values.ndim == 1: values = values[:, None]
+        if self._lanes is None:
+            n_lanes = 1 if self.joint else values.shape[1]
+            self._lanes = [{'frames': None, 'values': None, 'keys': []} for _ in range(n_lanes)]
+        if self.joint:
+            self._run(self._lanes[0], frames, values, final)
+        else:
+            for c, lane in enumerate(self._lanes):
+                self._run(lane, frames, values[:, c], final)
+
+    def finish(self):
+        """Flushes the carry and returns a list of C (k, 2) [frame, value] arrays."""
+        if self._lanes is None: return []
+        for lane in self._lanes:
+            if lane['frames'] is not None and len(lane['frames']):
+                frames, values = lane['frames'], lane['values']
+                lane['frames'] = lane['values'] = None
+                self._run(lane, frames, values, True)
+        out = []
+        for lane in self._lanes:
+            if not lane['keys']: continue
+            frames = np.concatenate([k[0] for k in lane['keys']])
+            values = np.concatenate([k[1] for k in lane['keys']])
+            out.extend(np.column_stack((frames, values[:, c])) for c in range(values.shape[1]))
+        return out
@@ -0,0 +1,54 @@
+"""
+Streaming rewrite of the color columns of drone CSV files.
+
+Each line of a drone-<name>.csv is one frame; its last three tab-separated
+columns are the R, G, B bytes. patch_file() compares the file against the
+baked colors line by line and leaves it untouched when nothing differs.
+Otherwise it streams the patched lines into a temp file next to it and
+renames that over the original, so a crash never leaves a truncated file.
+Only one line is held in memory at a time.
+"""
+import os
+import time
+
+# Columns of a drone CSV line; short lines are padded before the colors are set
+CSV_COLUMNS = 7
+
+def patch_line(line, rgb):
+    """`line` with its last three columns replaced by the strings in `rgb`; keeps the line ending."""
+    body = line.rstrip('\r\n')
+    cols = body.split('\t')
+    if len(cols) < CSV_COLUMNS: cols += [''] * (CSV_COLUMNS - len(cols))
+    cols[-3:] = rgb
+    return '\t'.join(cols) + line[len(body):]
+
+def _first_change(path, rows):
+    """Index of the first line the colors would change, or None if the file already matches."""
+    with open(path) as src:
+        for idx, line in enumerate(src):
+            if idx >= len(rows): break
+            if patch_line(line, rows[idx]) != line: return idx
+    return None
+
+def patch_file(path, colors):
+    """
+    Writes colors ((n, 3) uint8, one row per line from the first frame) into
+    the CSV at `path`. Lines past the end of `colors` are kept as they are.
+    Returns (changed, seconds, bytes_read).
+    """
+    t0 = time.perf_counter()
+    rows = [[str(c) for c in rgb] for rgb in colors.tolist()]
+    first = _first_change(path, rows)
+    if first is None:
+        return False, time.perf_counter() - t0, os.path.getsize(path)
+
+    tmp = path + ".tmp"
+    try:
+        with open(path) as src, open(tmp, 'w') as dst:
+            for idx, line in enumerate(src):
+                dst.write(patch_line(line, rows[idx]) if first <= idx < len(rows) else line)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp): os.remove(tmp)
+        raise
+    return True, time.perf_counter() - t0, os.path.getsize(path)
@@ -0,0 +1,146 @@
+"""
+Domain effector kernels: which drones are inside a volume on which frame,
+and the color keys marking each entry and exit.
+
+Positions are (frames, drones, 3) arrays sampled once for the whole show;
+a drone is keyed with the effector color when it enters the domain and
+when it leaves, each pulse fading back to its base color after the
+transition.
+
+Mesh domains are voxelized once into a signed distance grid in the
+domain's local space (negative inside); moving domains are handled by
+taking the drones into local space frame by frame, so every query is a
+trilinear lookup over the whole position array.
+"""
+import numpy as np
+
+def inside_box(points, lo, hi):
+    """(...) mask of points (..., 3) inside the axis-aligned box lo..hi, bounds included."""
+    return np.all((points >= lo) & (points <= hi), axis=-1)
+
+def box_distance(points, lo, hi):
+    """Signed distance of points (..., 3) to the surface of the box lo..hi, negative inside."""
+    q = np.abs(points - (lo + hi) / 2) - (hi - lo) / 2
+    return np.linalg.norm(np.maximum(q, 0), axis=-1) + np.minimum(q.max(axis=-1), 0)
+
+def crossings(inside):
+    """
+    Entry and exit masks of an (F, ...) inside mask. The drone counts as
+    outside before the first frame, so being inside at frame 0 is an entry.
+    """
+    prev = np.zeros_like(inside)
+    prev[1:] = inside[:-1]
+    return inside & ~prev, ~inside & prev
+
+def pulse_keys(inside, start, trans, color, base):
+    """
+    Keys of one drone's domain pulses: (frames (m,), values (m, 3)).
+
+    inside : (F,) mask over frames start .. start + F - 1
+
+    An entry on frame f keys the color at f and the base at f + trans; an
+    exit on f keys them at f - 1 and f - 1 + trans, the last frame inside.
+    Where keys fall on the same frame the later one wins, as with repeated
+    keyframe_insert calls in frame order.
+    """
+    enter, leave = crossings(np.asarray(inside, dtype=bool))
+    # Exits are found one frame after the key they write, so both sort by detection frame
+    at = np.concatenate((np.flatnonzero(enter), np.flatnonzero(leave)))
+    times = np.concatenate((np.flatnonzero(enter), np.flatnonzero(leave) - 1))
+    times = times[np.argsort(at, kind='stable')] + start
+    key_frames = np.stack((times, times + trans), axis=1).ravel()
+    values = np.empty((len(times), 2, 3), dtype=np.float64)
+    values[:, 0] = np.asarray(color, dtype=np.float64)[:3]
+    values[:, 1] = np.asarray(base, dtype=np.float64)[:3]
+    values = values.reshape(-1, 3)
+
+    # Last occurrence of every frame, in frame order
+    rev_frames, rev_first = np.unique(key_frames[::-1], return_index=True)
+    return rev_frames, values[::-1][rev_first]
+
+# --- Mesh volumes ---
+def grid_axes(lo, hi, resolution, pad=0.0):
+    """
+    Voxel center coordinates along x, y, z covering lo..hi grown by pad,
+    with cubic voxels and `resolution` of them along the longest side.
+    """
+    lo = np.asarray(lo, dtype=np.float64) - pad
+    hi = np.asarray(hi, dtype=np.float64) + pad
+    step = max(float((hi - lo).max()), 1e-9) / max(1, resolution - 1)
+    return [lo[i] + step * np.arange(int(np.ceil((hi[i] - lo[i]) / step)) + 1) for i in range(3)]
+
+def parity_inside(hits, xs):
+    """Inside mask of points xs along one ray, from the sorted-or-not x of its surface hits (even-odd rule)."""
+    return np.searchsorted(np.sort(np.asarray(hits, dtype=np.float64)), xs) % 2 == 1
+
+def surface_band(inside, reach):
+    """
+    Mask of the voxels within `reach` steps (26-neighborhood) of the
+    surface, i.e. of a voxel with a neighbor on the other side.
+    """
+    edge = np.zeros_like(inside)
+    for axis in range(3):
+        hi = [slice(None)] * 3; lo = [slice(None)] * 3
+        hi[axis], lo[axis] = slice(1, None), slice(None, -1)
+        flip = inside[tuple(hi)] != inside[tuple(lo)]
+        edge[tuple(hi)] |= flip
+        edge[tuple(lo)] |= flip
+    band = edge
+    for _ in range(int(reach)):
+        if band.all(): break
+        for axis in range(3):
+            grown = band.copy()
+            hi = [slice(None)] * 3; lo = [slice(None)] * 3
+            hi[axis], lo[axis] = slice(1, None), slice(None, -1)
+            grown[tuple(hi)] |= band[tuple(lo)]
+            grown[tuple(lo)] |= band[tuple(hi)]
+            band = grown
+    return band
+
+def sample_grid(grid, axes, points):
+    """
+    Trilinear lookup of a voxel grid (nx, ny, nz) at points (..., 3).
+    Points beyond the grid read its nearest border value plus their
+    distance to it, which keeps a distance grid conservative outside.
+    """
+    origin = np.array([a[0] for a in axes])
+    step = axes[0][1] - axes[0][0] if len(axes[0]) > 1 else 1.0
+    shape = np.array(grid.shape)
+    u = (points - origin) / step
+    clamped = np.clip(u, 0, shape - 1)
+    outside = np.linalg.norm(u - clamped, axis=-1) * step
+    i0 = np.minimum(clamped.astype(np.int64), np.maximum(shape - 2, 0))
+    t = clamped - i0
+    i1 = np.minimum(i0 + 1, shape - 1)
+    out = np.zeros(points.shape[:-1])
+    for dx in (0, 1):
+        wx = t[..., 0] if dx else 1 - t[..., 0]
+        x = i1[..., 0] if dx else i0[..., 0]
+        for dy in (0, 1):
+            wy = t[..., 1] if dy else 1 - t[..., 1]
+            y = i1[..., 1] if dy else i0[..., 1]
+            for dz in (0, 1):
+                wz = t[..., 2] if dz else 1 - t[..., 2]
+                z = i1[..., 2] if dz else i0[..., 2]
+                out += wx * wy * wz * grid[x, y, z]
+    return out + outside
+
+def to_local(points, matrices):
+    """
+    Points (F, D, 3) in the local space of a domain whose world matrix is
+    (4, 4) or (F, 4, 4). Also returns the per-frame world length of one
+    local unit (cube root of the scale), (F,) or scalar.
+    """
+    inv = np.linalg.inv(matrices)
+    local = np.einsum('...ij,...dj->...di', inv[..., :3, :3], points) + inv[..., None, :3, 3]
+    scale = np.cbrt(np.abs(np.linalg.det(np.asarray(matrices)[..., :3, :3])))
+    return local, scale
+
+def falloff(distance, width):
+    """
+    Domain weight from a signed distance: 1 inside, easing to 0 at
+    `width` outside; a hard 0/1 mask when width is 0.
+    """
+    if width <= 0: return (distance <= 0).astype(np.float64)
+    x = np.clip(1 - distance / width, 0, 1)
+    return x * x * (3 - 2 * x)
@@ -0,0 +1,147 @@
+"""
+Event-driven bake: evaluates a drone only around keyframe times.
+
+Between two consecutive breakpoints (the key times of the drone's layers
+and of the layer opacities, plus the frames where a layer switches on or
+off) every LINEAR or CONSTANT input is a straight line, so the blended
+color is smooth there and usually a straight line too. bake_drone_keys()
+evaluates the breakpoints only, then probes each span and subdivides the
+spans that do not follow a line (Bezier segments, MULTIPLY and other
+non-linear blends, clamped ADD/SUBTRACT). The probed samples are
+compressed straight into color keys, so the work grows with the number
+of keyframes instead of the number of frames.
+
+Half of the tolerance goes to the span test and half to the final
+compression; the keys stay within the tolerance of the quantized colors
+at every frame the probes can see.
+"""
+import numpy as np
+from . import compress, stack
+from .blend import OPACITY_EPSILON, to_bytes
+
+def key_indices(times, frame_start, n_frames):
+    """
+    Frame indices around every key time: floor(t) and ceil(t) for a
+    LINEAR kink, ceil(t) - 1 and ceil(t) so a CONSTANT step (which takes
+    effect at t) falls between two evaluated frames.
+    """
+    t = np.asarray(times, dtype=np.float64) - frame_start
+    lo, hi = np.floor(t).astype(np.int64), np.ceil(t).astype(np.int64)
+    idx = np.concatenate((lo, hi - 1, hi))
+    return idx[(idx >= 0) & (idx < n_frames)]
+
+def scene_breakpoints(opacity_curves, opacities, frames):
+    """
+    Breakpoints shared by every drone, from the layer opacities.
+
+    opacity_curves : {layer_index: exported curve} of the animated opacities
+    opacities      : (frames, layers) sampled opacities
+    Analytic curves contribute their key times; dense samples (modifiers,
+    easing) contribute every frame where the slope changes. The frames
+    where a layer becomes active or inactive are always included.
+    """
+    frames = np.asarray(frames, dtype=np.float64)
+    n = len(frames)
+    parts = [np.array([0, max(n - 1, 0)], dtype=np.int64)]
+    for curve in opacity_curves.values():
+        if 'dense' in curve:
+            d = np.asarray(curve['dense'], dtype=np.float64)
+            parts.append(np.flatnonzero(np.diff(d, 2) != 0) + 1)
+        else:
+            parts.append(key_indices(curve['co'][:, 0], frames[0], n))
+    active = np.asarray(opacities) > OPACITY_EPSILON
+    edges = np.flatnonzero((active[1:] != active[:-1]).any(axis=1))
+    parts += [edges, edges + 1]
+    return np.unique(np.concatenate(parts))
+
+def drone_breakpoints(curve_map, frames, enabled, scene_breaks):
+    """
+    Breakpoints of one drone, or None if a layer curve is only available
+    as dense samples (the drone is then evaluated on every frame).
+    """
+    n = len(frames)
+    parts = [np.asarray(scene_breaks, dtype=np.int64)]
+    for num, curves in curve_map.items():
+        if num - 1 >= len(enabled) or not enabled[num - 1]: continue
+        for curve in curves.values():
+            if 'dense' in curve: return None
+            parts.append(key_indices(curve['co'][:, 0], frames[0], n))
+    return np.unique(np.concatenate(parts))
+
+def _subset(curve_map, idx):
+    """curve_map with dense samples cut down to frames[idx]."""
+    return {num: {ch: ({'dense': c['dense'][idx]} if 'dense' in c else c) for ch, c in curves.items()}
+            for num, curves in curve_map.items()}
+
+def evaluate_frames(curve_map, initials, frames, opacities, modes, enabled, idx):
+    """Quantized colors at frames[idx] as (len(idx), 3) float32, as the dense bake produces them."""
+    plan = stack.compile_layers(opacities[idx], modes, enabled)
+    rgb = stack.bake_drone(plan, _subset(curve_map, idx), initials, frames[idx])
+    return to_bytes(rgb).astype(np.float32) / 255.0
+
+def refine(evaluate, idx, values, tol):
+    """
+    Adaptive subdivision. Each span of more than one frame is probed at
+    its quarter points; spans where a probe strays more than `tol` from
+    the straight line between the span ends keep their probes as new
+    breakpoints and are tested again. Returns the final (idx, values) and
+    the number of frames evaluated.
+    """
+    evaluated = len(idx)
+    while True:
+        a, b = idx[:-1], idx[1:]
+        long_ = b - a > 1
+        if not long_.any(): break
+        seg = np.flatnonzero(long_)
+        a, b = a[seg], b[seg]
+        span = b - a
+        probes = np.stack((a + span // 4, a + span // 2, a + 3 * span // 4), axis=1)
+        uniq, inv = np.unique(probes, return_inverse=True)
+        inv = inv.reshape(probes.shape)
+        pv = evaluate(uniq)
+        evaluated += len(uniq)
+
+        t = ((probes - a[:, None]) / span[:, None])[..., None]
+        va, vb = values[seg][:, None], values[seg + 1][:, None]
+        err = np.abs(pv[inv] - (va + (vb - va) * t)).max(axis=(1, 2))
+        bad = err > tol
+        if not bad.any(): break
+
+        new = np.setdiff1d(probes[bad], idx)
+        new_vals = pv[np.searchsorted(uniq, new)]
+        idx = np.concatenate((idx, new))
+        values = np.concatenate((values, new_vals))
+        order = np.argsort(idx, kind='stable')
+        idx, values = idx[order], values[order]
+    return idx, values, evaluated
+
+def bake_drone_keys(curve_map, initials, frames, opacities, modes, enabled, scene_breaks,
+                    epsilon, joint=False):
+    """
+    Color keys of one drone without a dense bake.
+
+    curve_map/initials are as for fcurve.sample_layer_stack, opacities is
+    the (frames, layers) array and scene_breaks comes from
+    scene_breakpoints(). Returns (channel_keys, n_evaluated) where
+    channel_keys is a list of three (k, 2) [frame, value] arrays as
+    compress.simplify_channels (or simplify_rgb with joint) returns them.
+    """
+    frames = np.asarray(frames, dtype=np.float64)
+    opacities = np.asarray(opacities, dtype=np.float64)
+
+    def evaluate(idx):
+        return evaluate_frames(curve_map, initials, frames, opacities, modes, enabled, idx)
+
+    idx = None
+    if epsilon > 0.0:
+        idx = drone_breakpoints(curve_map, frames, enabled, scene_breaks)
+    if idx is None:
+        idx = np.arange(len(frames))
+        values, evaluated = evaluate(idx), len(idx)
+    else:
+        values = evaluate(idx)
+        idx, values, evaluated = refine(evaluate, idx, values, epsilon / 2.0)
+        epsilon = epsilon / 2.0
+
+    simplify = compress.simplify_rgb if joint else compress.simplify_channels
+    return simplify(frames[idx].astype(np.float32), values, epsilon), evaluated
@@ -0,0 +1,106 @@
+import numpy as np
+
+# Keyframe.interpolation enum values as returned by foreach_get
+CONSTANT, LINEAR, BEZIER = 0, 1, 2
+
+def _correct_bezpart(p0x, p1, p2, p3x, p0, p3):
+    """
+    Port of BKE_fcurve_correct_bezpart: scales both handles of a segment so
+    they never overlap in time, which keeps x(t) monotonic.
+    """
+    span = p3x - p0x
+    len1 = np.abs(p0x - p1[:, 0])
+    len2 = np.abs(p3x - p2[:, 0])
+    total = len1 + len2
+    fac = np.where(total > span, span / np.where(total > 0, total, 1.0), 1.0)[:, None]
+    return p0 - fac * (p0 - p1), p3 - fac * (p3 - p2)
+
+def _cubic(a, b, c, d, t):
+    mt = 1.0 - t
+    return mt*mt*mt*a + 3*mt*mt*t*b + 3*mt*t*t*c + t*t*t*d
+
+def _cubic_deriv(a, b, c, d, t):
+    mt = 1.0 - t
+    return 3*mt*mt*(b - a) + 6*mt*t*(c - b) + 3*t*t*(d - c)
+
+def evaluate_keys(co, hl, hr, ipo, frames, newton_steps=8):
+    """
+    Evaluates an F-Curve from its keyframe arrays at every frame at once.
+
+    co, hl, hr : (n, 2) keyframe coordinates and left/right handles
+    ipo        : (n,) interpolation codes (CONSTANT, LINEAR or BEZIER)
+    frames     : (F,) sample times
+
+    Matches FCurve.evaluate() for curves without modifiers that use
+    constant extrapolation.
+    """
+    frames = np.asarray(frames, dtype=np.float64)
+    n = len(co)
+    if n == 0: return np.zeros(len(frames))
+    if n == 1: return np.full(len(frames), co[0, 1], dtype=np.float64)
+
+    xs = co[:, 0]
+    seg = np.clip(np.searchsorted(xs, frames, side='right') - 1, 0, n - 2)
+    x0, y0 = xs[seg], co[seg, 1]
+    x1, y1 = xs[seg + 1], co[seg + 1, 1]
+    mode = ipo[seg]
+
+    out = y0.copy()
+
+    lin = mode == LINEAR
+    if lin.any():
+        dx = x1[lin] - x0[lin]
+        t = (frames[lin] - x0[lin]) / np.where(dx != 0, dx, 1.0)
+        out[lin] = y0[lin] + (y1[lin] - y0[lin]) * t
+
+    bez = mode == BEZIER
+    if bez.any():
+        s = seg[bez]
+        f = frames[bez]
+        p0, p3 = co[s], co[s + 1]
+        p1, p2 = _correct_bezpart(p0[:, 0], hr[s], hl[s + 1], p3[:, 0], p0, p3)
+
+        # Solve x(t) = f with Newton steps from the linear guess
+        span = p3[:, 0] - p0[:, 0]
+        t = np.clip((f - p0[:, 0]) / np.where(span != 0, span, 1.0), 0.0, 1.0)
+        for _ in range(newton_steps):
+            err = _cubic(p0[:, 0], p1[:, 0], p2[:, 0], p3[:, 0], t) - f
+            d = _cubic_deriv(p0[:, 0], p1[:, 0], p2[:, 0], p3[:, 0], t)
+            step = np.where(np.abs(d) > 1e-12, err / np.where(d != 0, d, 1.0), 0.0)
+            t = np.clip(t - step, 0.0, 1.0)
+        val = _cubic(p0[:, 1], p1[:, 1], p2[:, 1], p3[:, 1], t)
+        # Flat segments return the key value exactly, without rounding noise
+        flat = (p0[:, 1] == p3[:, 1]) & (p1[:, 1] == p0[:, 1]) & (p2[:, 1] == p0[:, 1])
+        out[bez] = np.where(flat, p0[:, 1], val)
+
+    # Constant extrapolation outside the keyed range
+    out[frames <= xs[0]] = co[0, 1]
+    out[frames >= xs[-1]] = co[-1, 1]
+    return out
+
+def evaluate(curve, frames):
+    """
+    Evaluates an exported curve. Curves that could not be described by
+    keyframe arrays carry a 'dense' array already sampled at `frames`.
+    """
+    if 'dense' in curve: return curve['dense']
+    return evaluate_keys(curve['co'], curve['hl'], curve['hr'], curve['ipo'], frames)
+
+def sample_layer_stack(curve_map, initials, frames, enabled):
+    """
+    Samples every Layer_N channel into a (frames x layers x 3) array.
+    curve_map is {layer_num: {channel: curve}}; channels without a curve use
+    the drone's initial value. Disabled layers stay at zero.
+    """
+    out = np.zeros((len(frames), len(enabled), 3), dtype=np.float64)
+    for li, on in enumerate(enabled):
+        if not on: continue
+        layer_num = li + 1
+        curves = curve_map.get(layer_num, {})
+        for ch in range(3):
+            curve = curves.get(ch)
+            if curve is not None:
+                out[:, li, ch] = evaluate(curve, frames)
+            else:
+                out[:, li, ch] = initials[layer_num][ch]
+    return out
@@ -0,0 +1,77 @@
+"""
+Process-pool side of the bake.
+
+Inputs that are identical for every drone (frames, layer opacities, blend
+modes, solo/mute) and the output color buffer live in shared memory; each
+task only carries a batch of drones' exported keyframe arrays and returns
+a count, so no per-frame data is pickled.
+"""
+import contextlib
+import sys
+
+import numpy as np
+from multiprocessing import shared_memory
+from . import blend, stack
+
+# Per-process bake inputs, filled by attach()
+_state = {}
+
+def create_shared(shape, dtype):
+    """Allocates a shared-memory block and returns (shm, ndarray view, spec)."""
+    dtype = np.dtype(dtype)
+    size = max(1, int(np.prod(shape)) * dtype.itemsize)
+    shm = shared_memory.SharedMemory(create=True, size=size)
+    arr = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    return shm, arr, (shm.name, tuple(shape), dtype.str)
+
+def _open_shared(spec):
+    name, shape, dtype = spec
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+def release_shared(shm):
+    shm.close()
+    try: shm.unlink()
+    except FileNotFoundError: pass
+
+@contextlib.contextmanager
+def hidden_main():
+    """
+    Hides the __main__ script from processes spawned inside the block.
+    spawn re-imports __main__ (by __spec__ name, else __file__) in every
+    child; under `blender --python script.py` that script imports bpy,
+    which a plain worker process cannot, and the child dies on startup.
+    """
+    main = sys.modules['__main__']
+    saved = {k: getattr(main, k) for k in ('__file__', '__spec__') if hasattr(main, k)}
+    if '__file__' in saved: del main.__file__
+    main.__spec__ = None
+    try:
+        yield
+    finally:
+        for k, v in saved.items(): setattr(main, k, v)
+        if '__spec__' not in saved: del main.__spec__
+
+def attach(frames, opacities, modes, enabled, out):
+    """Installs the bake inputs for bake_batch in the current process."""
+    _state.update(frames=frames, out=out, plan=stack.compile_layers(opacities, modes, enabled))
+
+def detach():
+    _state.clear()
+
+def init_worker(frames_spec, opacity_spec, out_spec, modes, enabled):
+    """ProcessPoolExecutor initializer: maps the parent's shared buffers."""
+    handles = [_open_shared(s) for s in (frames_spec, opacity_spec, out_spec)]
+    # Keep the SharedMemory objects alive for the lifetime of the worker
+    _state['shm'] = [h[0] for h in handles]
+    attach(handles[0][1], handles[1][1], modes, enabled, handles[2][1])
+
+def bake_batch(batch):
+    """
+    Blends a batch of drones into the shared output buffer.
+    batch is a list of (row, curve_map, initials) tuples.
+    """
+    frames, plan, out = _state['frames'], _state['plan'], _state['out']
+    for row, curve_map, initials in batch:
+        out[row] = blend.to_bytes(stack.bake_drone(plan, curve_map, initials, frames))
+    return len(batch)
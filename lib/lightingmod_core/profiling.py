@@ -0,0 +1,77 @@
+"""Phase timing shared by the bake operator and the benchmarks."""
+import json
+import platform
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+# Bumped whenever the layout of profile files changes
+PROFILE_FORMAT = 1
+
+class PhaseTimer:
+    """
+    Wall-clock seconds per named phase plus counters. Safe to share across
+    threads: phases timed on worker threads add up, so together they can
+    exceed the wall time of the phase that ran the pool.
+    """
+    def __init__(self):
+        self.phases = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+        self._start = self._mark = time.perf_counter()
+
+    def elapsed(self):
+        return time.perf_counter() - self._start
+
+    def lap(self, name=None):
+        """Closes a sequential phase that began at the previous lap; None just restarts the lap."""
+        now = time.perf_counter()
+        if name: self.add(name, now - self._mark)
+        self._mark = now
+
+    @contextmanager
+    def phase(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - t0)
+
+    def add(self, name, seconds):
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def count(self, name, value):
+        self.counters[name] = value
+
+    def increment(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def summary(self, names=None):
+        """One line, e.g. 'discovery 0.12s, bake 3.40s'."""
+        names = names or list(self.phases)
+        return ", ".join(f"{n} {self.phases[n]:.2f}s" for n in names if n in self.phases)
+
+    def report(self):
+        width = max([len(n) for n in list(self.phases) + list(self.counters)] + [5])
+        for name, secs in self.phases.items():
+            print(f"  {name:<{width}} : {secs:9.4f} s")
+        for name, value in self.counters.items():
+            print(f"  {name:<{width}} : {value}")
+
+def environment(**extra):
+    env = {"python": platform.python_version(), "numpy": np.__version__,
+           "platform": platform.platform(), "machine": platform.machine()}
+    env.update(extra)
+    return env
+
+def write_profile(path, suite, config, timer, **extra):
+    """Writes one timed run as JSON; benchmarks/compare.py diffs two of them."""
+    data = {"format": PROFILE_FORMAT, "suite": suite, "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "environment": environment(**extra), "config": config,
+            "phases": timer.phases, "counters": timer.counters}
+    with open(path, "w") as f:
+        json.dump(data, f, indent=1)
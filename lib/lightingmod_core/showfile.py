@@ -0,0 +1,175 @@
+"""
+Compact binary color transfer (.lmshow), readable with NumPy alone.
+
+Layout, all little-endian:
+
+    header   magic b"LMSH", version u16, reserved u16, drone count u32,
+             table offset u64, names offset u64
+    blocks   per drone: frame deltas (n_keys - 1) x u16 or u32, then
+             n_keys x 3 u8 quantized RGB
+    names    UTF-8 drone names, back to back
+    table    per drone: block offset u64, n_keys u32, first frame i32,
+             name offset u32, name length u16, delta width u8, pad u8
+
+The table sits at the end so drones can be written one after another;
+ShowReader reads the header and table only and seeks to a drone's block
+on demand. Colors are bytes (value * 255, rounded); alpha is always 1.0
+in the JSON layout and is not stored.
+
+Converter between this format and the JSON color transfer (plain, .gz
+or .xz), run from the lib folder:
+    python -m lightingmod_core.showfile color_transfer.txt.gz show.lmshow
+    python -m lightingmod_core.showfile show.lmshow color_transfer.txt
+"""
+import json
+import os
+import struct
+import sys
+
+import numpy as np
+
+from .transfer import open_transfer
+
+MAGIC = b"LMSH"
+VERSION = 1
+EXTENSION = ".lmshow"
+
+HEADER = struct.Struct("<4sHHIQQ")
+TABLE_DTYPE = np.dtype([('offset', '<u8'), ('n_keys', '<u4'), ('first_frame', '<i4'),
+                        ('name_offset', '<u4'), ('name_len', '<u2'), ('delta_width', 'u1'), ('pad', 'u1')])
+
+def quantize_rgb(rgb):
+    """(n, 3) 0-1 floats as bytes."""
+    return np.clip(np.rint(np.asarray(rgb, dtype=np.float64) * 255.0), 0, 255).astype(np.uint8)
+
+class ShowWriter:
+    """
+    Writes drones one at a time; the file appears at `path` (atomically)
+    on close(). Use as a context manager.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._tmp = path + ".tmp"
+        self._f = open(self._tmp, "wb")
+        self._f.write(b"\0" * HEADER.size)
+        self._rows = []
+        self._names = []
+        self._names_len = 0
+
+    def add(self, name, frames, rgb):
+        """frames: (k,) increasing integers; rgb: (k, 3) bytes or 0-1 floats."""
+        frames = np.asarray(frames, dtype=np.int64)
+        rgb = np.asarray(rgb)
+        if rgb.dtype != np.uint8: rgb = quantize_rgb(rgb)
+        deltas = np.diff(frames)
+        if (deltas <= 0).any(): raise ValueError(f"{name}: frames must be strictly increasing")
+        width = 2 if not len(deltas) or deltas.max() <= 0xFFFF else 4
+
+        offset = self._f.tell()
+        self._f.write(deltas.astype(f"<u{width}").tobytes())
+        self._f.write(np.ascontiguousarray(rgb[:, :3]).tobytes())
+
+        encoded = str(name).encode("utf-8")
+        self._rows.append((offset, len(frames), int(frames[0]) if len(frames) else 0,
+                           self._names_len, len(encoded), width, 0))
+        self._names.append(encoded)
+        self._names_len += len(encoded)
+
+    def close(self):
+        if self._f is None: return
+        names_offset = self._f.tell()
+        self._f.write(b"".join(self._names))
+        table_offset = self._f.tell()
+        self._f.write(np.array(self._rows, dtype=TABLE_DTYPE).tobytes())
+        self._f.seek(0)
+        self._f.write(HEADER.pack(MAGIC, VERSION, 0, len(self._rows), table_offset, names_offset))
+        self._f.close()
+        self._f = None
+        os.replace(self._tmp, self.path)
+
+    def abort(self):
+        """Drops the partial file."""
+        if self._f is None: return
+        self._f.close()
+        self._f = None
+        os.remove(self._tmp)
+
+    def __enter__(self): return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None: self.close()
+        else: self.abort()
+
+class ShowReader:
+    """Random access to the drones of an .lmshow file."""
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            magic, version, _, n, table_offset, names_offset = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC: raise ValueError(f"{path}: not a show file")
+            if version > VERSION: raise ValueError(f"{path}: format version {version} is newer than {VERSION}")
+            f.seek(table_offset)
+            self.table = np.frombuffer(f.read(n * TABLE_DTYPE.itemsize), dtype=TABLE_DTYPE)
+            f.seek(names_offset)
+            names = f.read(table_offset - names_offset)
+        self.names = [names[o:o + l].decode("utf-8")
+                      for o, l in zip(self.table['name_offset'].tolist(), self.table['name_len'].tolist())]
+        self.index = {name: i for i, name in enumerate(self.names)}
+
+    def __len__(self): return len(self.names)
+
+    def __contains__(self, name): return name in self.index
+
+    def read(self, name):
+        """(frames (k,) int64, rgb (k, 3) uint8) of one drone."""
+        row = self.table[self.index[name]]
+        n, width = int(row['n_keys']), int(row['delta_width'])
+        with open(self.path, "rb") as f:
+            f.seek(int(row['offset']))
+            deltas = np.frombuffer(f.read(max(n - 1, 0) * width), dtype=f"<u{width}")
+            rgb = np.frombuffer(f.read(n * 3), dtype=np.uint8).reshape(n, 3)
+        frames = np.empty(n, dtype=np.int64)
+        if n:
+            frames[0] = row['first_frame']
+            frames[1:] = frames[0] + np.cumsum(deltas, dtype=np.int64)
+        return frames, rgb
+
+    def items(self):
+        for name in self.names: yield name, self.read(name)
+
+def transfer_arrays(keys):
+    """A JSON color-transfer drone block ({frame: [r, g, b, a]}) as (frames, rgb) arrays."""
+    items = sorted((int(f), col) for f, col in keys.items())
+    frames = np.array([f for f, _ in items], dtype=np.int64)
+    rgb = np.array([col[:3] for _, col in items], dtype=np.float64).reshape(-1, 3)
+    return frames, rgb
+
+def transfer_block(frames, rgb):
+    """Inverse of transfer_arrays() for byte colors."""
+    return {int(f): [*(c / 255.0 for c in col), 1.0] for f, col in zip(frames.tolist(), rgb.tolist())}
+
+def write_transfer(path, data):
+    """Writes a color-transfer dict ({drone: {frame: [r, g, b, a]}}) as a show file."""
+    with ShowWriter(path) as w:
+        for name, keys in data.items():
+            w.add(name, *transfer_arrays(keys))
+
+def read_transfer(path):
+    """A show file as the color-transfer dict the JSON export writes."""
+    return {name: transfer_block(frames, rgb) for name, (frames, rgb) in ShowReader(path).items()}
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        print(f"usage: python -m lightingmod_core.showfile SOURCE DEST  (one of them ending in {EXTENSION})")
+        return 2
+    src, dst = argv
+    if src.endswith(EXTENSION):
+        with open(dst, "w") as f: json.dump(read_transfer(src), f, indent=1)
+    else:
+        with open_transfer(src) as f: write_transfer(dst, json.load(f))
+    print(f"{src} ({os.path.getsize(src)} bytes) -> {dst} ({os.path.getsize(dst)} bytes)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""
+Sparkle schedules: which drone lights up on which frame, for a whole
+effector range at once.
+
+A sparkle lit on frame f with transition t keys the drone's base color at
+f, the sparkle color at f + t and the base color again at f + 2t; the
+drone can be picked again from f + 2t + 1 on. Schedules are plain arrays,
+so they can be keyed in bulk, stored and replayed.
+"""
+import numpy as np
+
+def schedule(n_drones, start, counts, trans, rng, active=None):
+    """
+    Sparkle events over frames start .. start + len(counts) - 1.
+
+    counts : drones to light per frame
+    trans  : transition length per frame (scalar or array like counts)
+    rng    : numpy.random.Generator
+    active : optional (n_drones,) mask of drones that can be keyed
+
+    On each frame counts[i] drones are drawn without replacement from the
+    drones whose cooldown has ended. Inactive drones are drawn like the
+    others but yield no event and no cooldown, as the per-key effectors
+    skip drones without the target property. Returns (frames, drones)
+    int64 arrays of event starts in frame order.
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    n = len(counts)
+    trans = np.broadcast_to(np.asarray(trans, dtype=np.int64), (n,))
+    ready = np.full(n_drones, start, dtype=np.int64)
+    out_f, out_d = [], []
+    i = 0
+    while i < n and n_drones:
+        f = start + i
+        elig = np.flatnonzero(ready <= f)
+        if not len(elig):
+            # Nobody is free until the earliest cooldown ends
+            i = max(i + 1, int(ready.min()) - start)
+            continue
+        k = min(int(counts[i]), len(elig))
+        if k > 0:
+            lit = rng.choice(elig, k, replace=False)
+            if active is not None: lit = lit[active[lit]]
+            ready[lit] = f + 2 * trans[i] + 1
+            out_f.append(np.full(len(lit), f, dtype=np.int64))
+            out_d.append(lit.astype(np.int64))
+        i += 1
+    if not out_f: return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(out_f), np.concatenate(out_d)
+
+def group_by_drone(drones, n_drones):
+    """Event indices per drone: a list of n_drones index arrays, each in event order."""
+    order = np.argsort(drones, kind='stable')
+    bounds = np.searchsorted(drones[order], np.arange(n_drones + 1))
+    return [order[bounds[d]:bounds[d + 1]] for d in range(n_drones)]
+
+def event_keys(frames, trans, colors, base):
+    """
+    Keys of one drone's sparkles: (frames (m,), values (m, 3)) with base,
+    color, base at f, f + t, f + 2t. Where keys fall on the same frame the
+    later one wins, as with repeated keyframe_insert calls.
+    """
+    frames = np.asarray(frames, dtype=np.int64)
+    trans = np.broadcast_to(np.asarray(trans, dtype=np.int64), frames.shape)
+    k = len(frames)
+    key_frames = np.stack((frames, frames + trans, frames + 2 * trans), axis=1).ravel()
+    values = np.empty((k, 3, 3), dtype=np.float64)
+    values[:, 0] = values[:, 2] = np.asarray(base, dtype=np.float64)[:3]
+    values[:, 1] = np.asarray(colors, dtype=np.float64)[:, :3]
+    values = values.reshape(-1, 3)
+
+    # Last occurrence of every frame, in frame order
+    rev_frames, rev_first = np.unique(key_frames[::-1], return_index=True)
+    return rev_frames, values[::-1][rev_first]
+
+# --- Temporal stages ---
+def smoothstep(x):
+    return x * x * (3 - 2 * x)
+
+def compile_stages(transitions, influences, palettes, start, end):
+    """
+    Per-frame arrays of a temporal sparkle over start..end.
+
+    transitions, influences : one value per stage
+    palettes : one (k, 3) color array per stage (k may be 0)
+
+    Progress through the stages eases with smoothstep. Each frame
+    interpolates the two stages around it; palette colors are blended
+    index by index over the colors both stages have, and when they share
+    none the frame uses the nonempty palette as is. Returns a dict of
+    'stage' (index of the first stage of the pair), 'alpha', 'trans' (int
+    frames), 'influence', 'palette' ((F, P, 3), padded) and 'pool_size'
+    (colors available per frame; 0 means no sparkles on that frame).
+    """
+    n_stages = len(transitions)
+    frames = np.arange(start, end + 1)
+    progress = smoothstep((frames - start) / max(1, end - start)) * (n_stages - 1)
+    stage = np.minimum(n_stages - 2, progress.astype(np.int64))
+    alpha = progress - stage
+
+    trans_s = np.asarray(transitions, dtype=np.float64)
+    infl_s = np.asarray(influences, dtype=np.float64)
+    trans = trans_s[stage] * (1 - alpha) + trans_s[stage + 1] * alpha
+    influence = infl_s[stage] * (1 - alpha) + infl_s[stage + 1] * alpha
+
+    palettes = [np.asarray(p, dtype=np.float64).reshape(-1, 3) for p in palettes]
+    width = max([len(p) for p in palettes] + [1])
+    table = np.zeros((len(frames), width, 3))
+    pool_size = np.zeros(len(frames), dtype=np.int64)
+    for s in range(n_stages - 1):
+        sel = stage == s
+        if not sel.any(): continue
+        c0, c1 = palettes[s], palettes[s + 1]
+        common = min(len(c0), len(c1))
+        if common:
+            a = alpha[sel][:, None, None]
+            table[sel, :common] = c0[:common] * (1 - a) + c1[:common] * a
+        else:
+            fallback = c0 if len(c0) else c1
+            common = len(fallback)
+            table[sel, :common] = fallback
+        pool_size[sel] = common
+
+    return {'frames': frames, 'stage': stage, 'alpha': alpha, 'trans': trans.astype(np.int64),
+            'influence': influence, 'palette': table, 'pool_size': pool_size}
+
+def stage_counts(timeline, n_drones):
+    """Drones to light per frame: influence spread over a full sparkle, none without colors."""
+    counts = np.maximum(1, np.round(n_drones * timeline['influence'] / np.maximum(1, timeline['trans'] * 2)))
+    return np.where(timeline['pool_size'] > 0, counts, 0).astype(np.int64)
+
+def schedule_stages(timeline, n_drones, rng, active=None):
+    """
+    Temporal sparkle events for a compile_stages() timeline: (frames,
+    drones, trans, colors) arrays, colors drawn uniformly from each
+    frame's palette. Counts are relative to all n_drones; see schedule()
+    for `active`.
+    """
+    start = int(timeline['frames'][0]) if len(timeline['frames']) else 0
+    frames, who = schedule(n_drones, start, stage_counts(timeline, n_drones), timeline['trans'], rng, active)
+    fi = frames - start
+    pick = (rng.random(len(frames)) * timeline['pool_size'][fi]).astype(np.int64)
+    return frames, who, timeline['trans'][fi], timeline['palette'][fi, pick]
@@ -0,0 +1,103 @@
+"""
+Layer-stack compiler: turns the scene's layer settings into a plan that
+skips everything that cannot change a drone's color.
+
+compile_layers() runs once per bake (or chunk). It drops disabled layers and
+layers whose opacity never exceeds OPACITY_EPSILON, and records the frames
+where each remaining layer is active. bake_drone() then folds constant
+layers with constant opacity into a constant base and blends the other
+layers only on their active frames. The result equals
+sample_layer_stack() followed by blend_stack().
+"""
+import numpy as np
+from . import fcurve
+from .blend import OPACITY_EPSILON, blend_arrays
+
+def compile_layers(opacities, modes, enabled):
+    """
+    Plan for a (frames, layers) opacity array.
+
+    Returns {'base': bool, 'n_frames': int, 'layers': [step, ...]} where
+    each step is {'index', 'mode', 'opacity', 'fac', 'sel'}. 'fac' is the
+    opacity as a float when it is the same on every frame, else None; 'sel'
+    picks the active frames (a slice when all frames are active).
+    """
+    opacities = np.asarray(opacities, dtype=np.float64)
+    n_frames = opacities.shape[0]
+    steps = []
+    for li in range(1, len(enabled)):
+        if not enabled[li]: continue
+        fac = opacities[:, li]
+        active = fac > OPACITY_EPSILON
+        if not active.any(): continue
+        const = n_frames > 0 and bool((fac == fac[0]).all())
+        steps.append({'index': li, 'mode': modes[li], 'opacity': fac,
+                      'fac': float(fac[0]) if const else None,
+                      'sel': slice(None) if active.all() else np.flatnonzero(active)})
+    return {'base': bool(enabled[0]) if len(enabled) else False, 'n_frames': n_frames, 'layers': steps}
+
+def _constant_curve_value(curve):
+    if 'dense' in curve:
+        d = curve['dense']
+        return float(d[0]) if len(d) and (d == d[0]).all() else None
+    co = curve['co']
+    if len(co) == 0: return 0.0
+    y = co[:, 1]
+    flat = (y == y[0]).all()
+    if flat and (curve['ipo'] == fcurve.BEZIER).any():
+        # Bezier handles can overshoot between equal keys
+        flat = (curve['hl'][:, 1] == y[0]).all() and (curve['hr'][:, 1] == y[0]).all()
+    return float(y[0]) if flat else None
+
+def constant_layer(curves, initial):
+    """(3,) color if a layer never changes over time, else None."""
+    out = np.array(initial[:3], dtype=np.float64)
+    for ch, curve in curves.items():
+        v = _constant_curve_value(curve)
+        if v is None: return None
+        out[ch] = v
+    return out
+
+def layer_values(curves, initial, frames, sel):
+    """(n, 3) color of one layer at frames[sel]."""
+    sub = np.asarray(frames, dtype=np.float64)[sel]
+    out = np.empty((len(sub), 3), dtype=np.float64)
+    for ch in range(3):
+        curve = curves.get(ch)
+        if curve is None:
+            out[:, ch] = initial[ch]
+        elif 'dense' in curve:
+            out[:, ch] = curve['dense'][sel]
+        else:
+            out[:, ch] = fcurve.evaluate_keys(curve['co'], curve['hl'], curve['hr'], curve['ipo'], sub)
+    return out
+
+def bake_drone(plan, curve_map, initials, frames):
+    """
+    Blends one drone's layers following a compile_layers() plan.
+    curve_map/initials are as for fcurve.sample_layer_stack.
+    Returns a (frames, 3) float64 array.
+    """
+    n = plan['n_frames']
+    base = np.zeros(3, dtype=np.float64)
+    if plan['base']:
+        curves = curve_map.get(1, {})
+        const = constant_layer(curves, initials[1])
+        base = const if const is not None else layer_values(curves, initials[1], frames, slice(None))
+
+    for step in plan['layers']:
+        num = step['index'] + 1
+        curves = curve_map.get(num, {})
+        top = constant_layer(curves, initials[num])
+        if base.ndim == 1 and top is not None and step['fac'] is not None:
+            # Constant over constant: fold into the base color once
+            base = blend_arrays(base, top, step['mode'], step['fac'])
+            continue
+        if base.ndim == 1: base = np.tile(base, (n, 1))
+
+        sel = step['sel']
+        if top is None: top = layer_values(curves, initials[num], frames, sel)
+        fac = step['opacity'][sel][:, None]
+        base[sel] = blend_arrays(base[sel], top, step['mode'], fac)
+
+    return np.tile(base, (n, 1)) if base.ndim == 1 else base
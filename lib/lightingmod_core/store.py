@@ -0,0 +1,180 @@
+import json
+import os
+import numpy as np
+
+def _replace_atomic(write, path):
+    """Writes via a temp file in the same folder, then renames over `path`."""
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        write(f)
+    os.replace(tmp, path)
+
+class BakedColorStore:
+    """
+    Baked drone colors as one contiguous (drones x frames x 3) uint8 array
+    plus a name -> row index. Behaves like the old {name: [(r, g, b), ...]}
+    dict for lookups and iteration; rows are uint8 views.
+
+    A store loaded from disk is memory-mapped read-only and copied into RAM
+    on the first write. create_on_disk() instead backs the store with a
+    writable memory map, for bakes larger than RAM.
+    """
+    def __init__(self):
+        self.clear()
+
+    def clear(self, frame_start=0, n_frames=0):
+        self.frame_start = frame_start
+        self.colors = np.zeros((0, n_frames, 3), dtype=np.uint8)
+        self.index = {}
+        self.key = None
+        self.dirty = False
+        self._rows = 0
+        self._free = []
+        self._disk_path = None
+
+    def discard(self):
+        """clear() that also deletes the buffer file of create_on_disk()."""
+        path = self._disk_path
+        self.clear()
+        if path:
+            try: os.remove(path)
+            except OSError: pass
+
+    @property
+    def n_frames(self):
+        return self.colors.shape[1]
+
+    def set_range(self, frame_start, n_frames):
+        """Drops every row if the frame range differs from the stored one."""
+        if (frame_start, n_frames) != (self.frame_start, self.n_frames):
+            self.clear(frame_start, n_frames)
+
+    # --- dict-like access ---
+    def __len__(self): return len(self.index)
+    def __contains__(self, name): return name in self.index
+    def __iter__(self): return iter(list(self.index))
+    def __getitem__(self, name): return self.colors[self.index[name]]
+    def __setitem__(self, name, colors): self.write(name, colors)
+
+    def __delitem__(self, name):
+        self._free.append(self.index.pop(name))
+        self.dirty = True
+
+    def get(self, name, default=None):
+        row = self.index.get(name)
+        return default if row is None else self.colors[row]
+
+    def items(self):
+        for name, row in list(self.index.items()):
+            yield name, self.colors[row]
+
+    # --- writing ---
+    def write(self, name, colors, offset=0):
+        """
+        Stores 0-255 colors (clipped) for `name` starting at frame index
+        `offset`. New rows must cover the full frame range.
+        """
+        colors = np.clip(np.asarray(colors), 0, 255)
+        row = self.index.get(name)
+        if row is None:
+            if offset or len(colors) != self.n_frames:
+                raise ValueError(f"'{name}' has no baked row; a full-range bake is required first")
+            row = self._allocate(name)
+        else:
+            self.make_writable()
+        self.colors[row, offset:offset + len(colors)] = colors
+        self.dirty = True
+
+    def make_writable(self):
+        """Copies a read-only memory-mapped cache into RAM."""
+        if isinstance(self.colors, np.memmap) and not self._disk_path:
+            self.colors = np.array(self.colors)
+
+    def _allocate(self, name):
+        if self._free:
+            row = self._free.pop()
+        else:
+            row = self._rows
+            if row >= len(self.colors) or isinstance(self.colors, np.memmap):
+                grown = np.zeros((max(16, 2 * len(self.colors)), self.n_frames, 3), dtype=np.uint8)
+                grown[:len(self.colors)] = self.colors
+                self.colors = grown
+                self._disk_path = None
+            self._rows += 1
+        self.index[name] = row
+        return row
+
+    # --- disk cache ---
+    @staticmethod
+    def meta_path(path):
+        return os.path.splitext(path)[0] + ".json"
+
+    def create_on_disk(self, path, names, frame_start, n_frames):
+        """
+        Replaces the store with a writable (names x frames x 3) memory map
+        at `path`. Rows of the current store are carried over one at a time
+        when the frame range matches, so RAM use stays at one row.
+        """
+        tmp = path + ".tmp"
+        colors = np.lib.format.open_memmap(tmp, mode='w+', dtype=np.uint8,
+                                           shape=(len(names), n_frames, 3))
+        if (frame_start, n_frames) == (self.frame_start, self.n_frames):
+            for i, name in enumerate(names):
+                row = self.index.get(name)
+                if row is not None: colors[i] = self.colors[row]
+        colors.flush()
+        # Both maps are closed before the rename; `path` may be the current store
+        colors = None
+        self.clear(frame_start, n_frames)
+        os.replace(tmp, path)
+        self.colors = np.load(path, mmap_mode='r+')
+        self.index = {name: i for i, name in enumerate(names)}
+        self._rows = len(names)
+        self._disk_path = path
+        self.dirty = True
+
+    def save(self, path, key):
+        """Writes the rows to `path` (.npy) and the index to a .json sidecar."""
+        names = list(self.index)
+        rows = [self.index[n] for n in names]
+        if self._disk_path:
+            # Rows already live on disk: move the file instead of copying it
+            self.colors.flush()
+            src, n_frames = self._disk_path, self.n_frames
+            self.colors = np.zeros((0, n_frames, 3), dtype=np.uint8)
+            if src != path: os.replace(src, path)
+            self.colors = np.load(path, mmap_mode='r')
+            self._disk_path = None
+        else:
+            # Compacted: freed rows are dropped, so the in-memory rows are renumbered too
+            data = np.ascontiguousarray(self.colors[rows] if names else self.colors[:0])
+            _replace_atomic(lambda f: np.save(f, data), path)
+            self.colors = data
+            rows = list(range(len(names)))
+        meta = {"key": key, "frame_start": self.frame_start, "n_frames": self.n_frames,
+                "names": names, "rows": rows}
+        _replace_atomic(lambda f: f.write(json.dumps(meta).encode()), self.meta_path(path))
+        self.index = dict(zip(names, rows))
+        self._rows = len(self.colors)
+        self._free = []
+        self.key = key
+        self.dirty = False
+
+    def load(self, path, key):
+        """Memory-maps a saved store if it exists and was saved with `key`."""
+        try:
+            with open(self.meta_path(path)) as f:
+                meta = json.load(f)
+            if meta.get("key") != key: return False
+            colors = np.load(path, mmap_mode='r')
+        except (OSError, ValueError):
+            return False
+        rows = meta.get("rows", list(range(len(meta["names"]))))
+        if colors.shape[1:] != (meta["n_frames"], 3) or (rows and max(rows) >= len(colors)): return False
+
+        self.clear(meta["frame_start"], meta["n_frames"])
+        self.colors = colors
+        self.index = dict(zip(meta["names"], rows))
+        self._rows = len(colors)
+        self.key = key
+        return True
@@ -0,0 +1,65 @@
+"""
+Streaming writer for the JSON color transfer.
+
+The file is the same {drone: {frame: [r, g, b, 1.0]}} object the exporter
+has always written, but each drone's block goes out as soon as it is
+added, with compact separators, so memory holds one drone at a time.
+Optional gzip or LZMA compression wraps the text stream; json.load on the
+decompressed text reads the result unchanged.
+"""
+import gzip
+import json
+import lzma
+import os
+
+# compression -> (opener, file extension)
+COMPRESSIONS = {
+    'NONE': (open, ".txt"),
+    'GZIP': (gzip.open, ".txt.gz"),
+    'LZMA': (lzma.open, ".txt.xz"),
+}
+
+def open_transfer(path):
+    """Text stream of a color transfer file, decompressing by extension."""
+    for opener, ext in COMPRESSIONS.values():
+        if opener is not open and path.endswith(ext): return opener(path, "rt", encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+class TransferWriter:
+    """
+    Writes drones one at a time; the file appears at `path` (atomically)
+    on close(). Same add/close/abort interface as showfile.ShowWriter.
+    """
+    def __init__(self, path, compression='NONE'):
+        self.path = path
+        self._tmp = path + ".tmp"
+        self._f = COMPRESSIONS[compression][0](self._tmp, "wt", encoding="utf-8")
+        self._f.write("{")
+        self._count = 0
+
+    def add(self, name, frames, rgb):
+        """frames: (k,) integers; rgb: (k, 3) 0-1 floats."""
+        block = {f: [*col, 1.0] for f, col in zip(frames.tolist(), rgb.tolist())}
+        if self._count: self._f.write(",")
+        self._f.write(json.dumps(str(name)) + ":" + json.dumps(block, separators=(",", ":")))
+        self._count += 1
+
+    def close(self):
+        if self._f is None: return
+        self._f.write("}")
+        self._f.close()
+        self._f = None
+        os.replace(self._tmp, self.path)
+
+    def abort(self):
+        """Drops the partial file."""
+        if self._f is None: return
+        self._f.close()
+        self._f = None
+        os.remove(self._tmp)
+
+    def __enter__(self): return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None: self.close()
+        else: self.abort()
@@ -2,70 +2,351 @@ import bpy
 import concurrent.futures
 import multiprocessing
 import numpy as np
+import os
 import re
-from .. import utils
+import time
+from .. import registry, utils
+from bpy.app.handlers import persistent
 from bpy.props import FloatProperty
+from lightingmod_core import blend, compress, events, fcurve, fingerprint, pool, profiling, stack
 
-# --- 1. Find Critical Points (Peaks, Valleys, Plateaus) ---
-def find_critical_indices(values):
+# Object property holding the fingerprint of the inputs of the last bake
+FINGERPRINT_PROP = "lm_bake_fingerprint"
+
+# Modal bake: timer period and the work done per timer tick, in seconds
+BAKE_TIMER_INTERVAL = 0.01
+BAKE_TIME_SLICE = 0.1
+# The bake holds object and F-Curve references across ticks; only view navigation
+# reaches Blender meanwhile, so nothing can undo, delete or edit them under it
+BAKE_PASS_EVENTS = {
+    'MOUSEMOVE', 'INBETWEEN_MOUSEMOVE', 'MIDDLEMOUSE', 'WHEELUPMOUSE', 'WHEELDOWNMOUSE',
+    'TRACKPADPAN', 'TRACKPADZOOM', 'MOUSEROTATE', 'MOUSESMARTZOOM',
+    'WINDOW_DEACTIVATE', 'TIMER', 'TIMERREPORT',
+}
+
+# --- 1. Analytic F-Curve Sampling ---
+def read_keyframes(fc):
+    """Bulk-reads co, handles, interpolation and easing with foreach_get."""
+    kps = fc.keyframe_points
+    n = len(kps)
+    keys = {}
+    for key, attr in (('co', 'co'), ('hl', 'handle_left'), ('hr', 'handle_right')):
+        buf = np.empty(n * 2, dtype=np.float32)
+        kps.foreach_get(attr, buf)
+        keys[key] = buf.reshape(-1, 2)
+    for key in ('interpolation', 'easing'):
+        buf = np.empty(n, dtype=np.int32)
+        kps.foreach_get(key, buf)
+        keys[key] = buf
+    return keys
+
+def export_fcurve(fc, frames):
     """
-    Identifies indices where the direction of change flips (slope sign change).
-    These points are mandatory to preserve strobe timing and intensity.
+    Snapshot of an F-Curve as plain arrays for lightingmod_core.fcurve.
+    Curves the kernel cannot evaluate analytically (modifiers, easing
+    interpolation, linear extrapolation) fall back to per-frame evaluate().
     """
-    n = len(values)
-    if n < 3:
-        return np.arange(n) # Keep all if too small
+    keys = read_keyframes(fc)
+    ipo = keys['interpolation']
+    if fc.modifiers or fc.extrapolation != 'CONSTANT' or (ipo[:-1] > fcurve.BEZIER).any():
+        return {'dense': np.array([fc.evaluate(f) for f in frames], dtype=np.float64)}
+    return {'co': keys['co'].astype(np.float64), 'hl': keys['hl'].astype(np.float64),
+            'hr': keys['hr'].astype(np.float64), 'ipo': ipo}
 
-    # Calculate differences between consecutive frames
-    diffs = np.diff(values) # Length n-1
-    
-    # Get signs (-1, 0, 1). 
-    signs = np.sign(diffs)
-    
-    # Where does the sign change? 
-    sign_change = signs[:-1] != signs[1:]
-    
-    # Get indices. Shift +1 because diff index i describes interval (i, i+1)
-    turning_points = np.where(sign_change)[0] + 1
-    
-    # Always include Start (0) and End (n-1)
-    critical = np.concatenate(([0], turning_points, [n-1]))
-    return np.unique(critical)
+def export_layer_curves(fc_map, frames):
+    return {num: {ch: export_fcurve(fc, frames) for ch, fc in chans.items()}
+            for num, chans in fc_map.items()}
+
+def sample_fcurve(fc, frames):
+    """FCurve.evaluate() over a whole frame array, without a per-frame RNA call."""
+    return fcurve.evaluate(export_fcurve(fc, frames), frames)
 
-# --- 2. RDP Simplification (Vertical Error Metric) ---
-def rdp_simplify(frames, values, epsilon):
+def sample_opacities(sc, opacity_fcurves, frames):
+    """(frames, layers) layer opacities; animated ones come from their F-Curves."""
+    cols = [sample_fcurve(opacity_fcurves[i], frames) if i in opacity_fcurves
+            else np.full(len(frames), layer.opacity) for i, layer in enumerate(sc.ly_layers)]
+    return np.array(cols, dtype=np.float64).T.reshape(len(frames), len(cols))
+
+# --- 2. Dirty Tracking ---
+def fcurve_fingerprint_parts(fc):
+    keys = read_keyframes(fc)
+    if (keys['interpolation'] > fcurve.BEZIER).any():
+        # Easing curves also depend on the BACK/ELASTIC shape settings
+        n = len(fc.keyframe_points)
+        for attr in ('amplitude', 'back', 'period'):
+            keys[attr] = np.empty(n, dtype=np.float32)
+            fc.keyframe_points.foreach_get(attr, keys[attr])
+    return (keys, fc.extrapolation, fc.mute, [m.type for m in fc.modifiers])
+
+def drone_fingerprint(scene_key, fc_map, initials):
+    """Digest of everything that feeds one drone's bake."""
+    curves = {num: {ch: fcurve_fingerprint_parts(fc) for ch, fc in chans.items()}
+              for num, chans in fc_map.items()}
+    return fingerprint.digest(scene_key, curves, initials)
+
+def timeline_signature(name, fp, fc_map):
     """
-    Reduces points using Ramer-Douglas-Peucker with Vertical Distance error.
+    Key under which drones share one evaluation. The fingerprint covers
+    everything but modifier settings, so drones with modified curves keep
+    a signature of their own.
     """
-    points = np.column_stack((frames, values))
-    
-    if len(points) < 3:
-        return points
+    if any(fc.modifiers for chans in fc_map.values() for fc in chans.values()):
+        return (fp, name)
+    return fp
+
+def bake_color_key(sc, opacity_fcurves):
+    """Digest of the scene-wide inputs that determine baked colors."""
+    return fingerprint.digest(
+        sc.name, sc.frame_start, sc.frame_end,
+        [(l.blend_mode, l.opacity, l.solo, l.mute) for l in sc.ly_layers],
+        {i: fcurve_fingerprint_parts(fc) for i, fc in opacity_fcurves.items()})
+
+def count_input_keys(fcurves):
+    """(curves, keyframes) over an iterable of F-Curves."""
+    fcurves = list(fcurves)
+    return len(fcurves), sum(len(fc.keyframe_points) for fc in fcurves)
+
+def has_color_curves(o):
+    ad = o.animation_data
+    return bool(ad and ad.action and ad.action.fcurves.find("color", index=0))
 
-    start = points[0]
-    end = points[-1]
+# --- 3. Keyframe Writing ---
+def write_color_curves(o, channel_keys, window=None):
+    """
+    Writes (n, 2) key arrays to the object's three `color` F-Curves.
+    Without a window the curves are recreated; with a (start, end) window
+    only keys inside it are replaced and keys outside it are kept, like
+    LIGHTINGMOD_OT_movie_sampler.save_keyframes.
+    """
+    if not o.animation_data: o.animation_data_create()
+    if not o.animation_data.action: 
+        o.animation_data.action = bpy.data.actions.new(name=f"{o.name}_color")
     
-    dx = end[0] - start[0]
-    if dx == 0:
-        dists = np.zeros(len(points))
-    else:
-        # Line Eq: y = mx + c
-        m = (end[1] - start[1]) / dx
-        c = start[1] - m * start[0]
-        
-        # Expected Y vs Actual Y
-        expected_y = m * points[:, 0] + c
-        dists = np.abs(points[:, 1] - expected_y)
+    action = o.animation_data.action
+
+    if window is None:
+        # Remove existing color curves
+        existing_curves = [fc for fc in action.fcurves if fc.data_path == "color"]
+        for fc in existing_curves: action.fcurves.remove(fc)
+
+    for channel, new_keys in enumerate(channel_keys):
+        fc = None if window is None else action.fcurves.find("color", index=channel)
+        if not fc: fc = action.fcurves.new(data_path="color", index=channel)
+
+        final_keys = np.asarray(new_keys, dtype=np.float32)
+        n_points = len(fc.keyframe_points)
+        if n_points > 0:
+            existing = np.empty(n_points * 2, dtype=np.float32)
+            fc.keyframe_points.foreach_get('co', existing)
+            existing = existing.reshape((-1, 2))
+
+            # Keep keys strictly BEFORE start or AFTER end
+            mask = (existing[:, 0] < window[0]) | (existing[:, 0] > window[1])
+            if mask.any():
+                final_keys = np.vstack((existing[mask], final_keys))
+                final_keys = final_keys[final_keys[:, 0].argsort(kind='stable')]
+            fc.keyframe_points.clear()
 
-    dmax = dists.max()
-    index = dists.argmax()
+        fc.keyframe_points.add(len(final_keys))
+        fc.keyframe_points.foreach_set('co', final_keys.flatten())
+        fc.update()
 
-    if dmax > epsilon:
-        res1 = rdp_simplify(frames[:index+1], values[:index+1], epsilon)
-        res2 = rdp_simplify(frames[index:],   values[index:],   epsilon)
-        return np.vstack((res1[:-1], res2))
-    else:
-        return np.array([start, end])
+# --- 4. Baked Color Cache (.npy next to the .blend) ---
+def find_opacity_fcurves(sc):
+    opacity_fcurves = {}
+    if sc.animation_data and sc.animation_data.action:
+        for fc in sc.animation_data.action.fcurves:
+            m = re.match(r'ly_layers\[(\d+)\]\.opacity', fc.data_path)
+            if m: opacity_fcurves[int(m.group(1))] = fc
+    return opacity_fcurves
+
+def bake_cache_path():
+    """
+    Cache file of this .blend, or None while it is unsaved. There is one
+    per file; the scene key it was baked with lives in its .json sidecar.
+    """
+    if not bpy.data.filepath: return None
+    folder, blend_name = os.path.split(bpy.data.filepath)
+    stem = os.path.splitext(blend_name)[0]
+    return os.path.join(folder, f"{stem}.lmcolors.npy")
+
+def remove_keyed_caches(path):
+    """Deletes the per-key caches (<stem>.<key>.lmcolors.*) older versions left next to `path`."""
+    folder, name = os.path.split(path)
+    pattern = re.compile(re.escape(name[:-len(".lmcolors.npy")]) + r"\.[0-9a-f]{12}\.lmcolors\.")
+    for entry in os.listdir(folder or "."):
+        if pattern.match(entry):
+            try: os.remove(os.path.join(folder, entry))
+            except OSError: pass
+
+def load_baked_colors(sc, key=None):
+    """
+    Fills an empty utils.baked_colors from the on-disk cache of this scene.
+    Returns True if baked colors are available afterwards.
+    """
+    if utils.baked_colors: return True
+    key = key or bake_color_key(sc, find_opacity_fcurves(sc))
+    path = bake_cache_path()
+    return bool(path) and utils.baked_colors.load(path, key)
+
+def save_baked_colors(key):
+    path = bake_cache_path()
+    if not path or not utils.baked_colors.dirty: return None
+    utils.baked_colors.save(path, key)
+    remove_keyed_caches(path)
+    return path
+
+@persistent
+def _on_load_post(_):
+    # Baked colors belong to the previous file; reload lazily from its cache
+    utils.baked_colors.clear()
+    # A modal bake does not survive the load; don't let it block the next one
+    utils.bake_progress.clear()
+
+def bake_buffer_path(key):
+    """Disk-backed store of a chunked bake; it becomes the cache file on save."""
+    path = bake_cache_path()
+    if path: return path[:-len(".npy")] + ".partial.npy"
+    return os.path.join(bpy.app.tempdir, f"{key[:12]}.lmcolors.partial.npy")
+
+def bake_profile_path():
+    """JSON bake profile next to the .blend, or None while the file is unsaved."""
+    if not bpy.data.filepath: return None
+    return os.path.splitext(bpy.data.filepath)[0] + ".bake-profile.json"
+
+def active_group_names(sc):
+    """Object names in the active group of the active formation."""
+    if sc.drone_formations and sc.drone_formations[sc.drone_formations_index].groups:
+        f = sc.drone_formations[sc.drone_formations_index]
+        return {d.object_name for d in f.groups[f.groups_index].drones}
+    return set()
+
+def run_process_bake(drones, frames, opacities, modes, enabled, workers):
+    """
+    Generator that bakes exported drones, a list of (name, curve_map,
+    initials), across worker processes. Shared inputs and the color output
+    travel through shared memory. Runs serially in-process when
+    workers <= 1 or the pool cannot be started.
+    Yields the number of drones done after each batch and returns
+    ({name: (frames, 3) uint8 array}, used_pool).
+    """
+    n = len(drones)
+    shms = []
+    views = {}
+    try:
+        for key, arr in (('frames', np.asarray(frames, dtype=np.float64)),
+                         ('opacities', np.ascontiguousarray(opacities, dtype=np.float64))):
+            shm, view, spec = pool.create_shared(arr.shape, arr.dtype)
+            view[:] = arr
+            shms.append(shm); views[key] = (view, spec)
+        shm, out, out_spec = pool.create_shared((n, len(frames), 3), np.uint8)
+        shms.append(shm); views['out'] = (out, out_spec)
+
+        items = [(row, curve_map, initials) for row, (_, curve_map, initials) in enumerate(drones)]
+        size = max(1, -(-n // (max(1, workers) * 4)))
+        batches = [items[i:i + size] for i in range(0, n, size)]
+
+        used_pool = False
+        if workers > 1 and n > 1:
+            try:
+                ctx = multiprocessing.get_context('spawn')
+                initargs = (views['frames'][1], views['opacities'][1], out_spec, modes, enabled)
+                with concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                                                            initializer=pool.init_worker,
+                                                            initargs=initargs) as executor:
+                    # Workers are spawned by submit(); none of them may re-run the caller's script
+                    with pool.hidden_main():
+                        futures = [executor.submit(pool.bake_batch, b) for b in batches]
+                    try:
+                        done = 0
+                        for future in concurrent.futures.as_completed(futures):
+                            done += future.result()
+                            yield done
+                    except GeneratorExit:
+                        # Cancelled: drop queued batches and wait for the running ones,
+                        # so no worker maps the shared blocks after they are released
+                        executor.shutdown(wait=True, cancel_futures=True)
+                        raise
+                used_pool = True
+            except Exception as e:
+                print(f"WARNING: process bake failed ({type(e).__name__}: {e}); baking serially")
+
+        if not used_pool:
+            pool.attach(views['frames'][0], views['opacities'][0], modes, enabled, out)
+            done = 0
+            for b in batches:
+                done += pool.bake_batch(b)
+                yield done
+
+        results = {name: out[row].copy() for row, (name, _, _) in enumerate(drones)}
+        return results, used_pool
+    finally:
+        # Views must be dropped before the shared blocks can be closed
+        pool.detach()
+        views.clear(); out = view = None
+        for shm in shms: pool.release_shared(shm)
+
+def run_chunked_bake(drones, sc, opacity_fcurves, frames, modes, enabled, chunk,
+                     tolerance, joint, store, offset=0, prof=None, twins=None):
+    """
+    Generator running a NumPy bake of drones ({name: {'fc_map',
+    'initials'}}) over `frames` in chunks of `chunk` frames. Each chunk's
+    colors go straight into `store` from frame index `offset` (drones
+    without a row are skipped), and into the rows of its `twins`, and
+    through one StreamCompressor per drone, so peak memory follows the
+    chunk size instead of the show length.
+    Yields the number of frames done after each chunk and returns
+    {name: channel keys}.
+    """
+    prof = prof or profiling.PhaseTimer()
+    twins = twins or {}
+    compressors = {name: compress.StreamCompressor(tolerance, joint) for name in drones}
+
+    def bake_chunk(name, data, chunk_frames, plan):
+        with prof.phase("export"):
+            curves = export_layer_curves(data['fc_map'], chunk_frames)
+        with prof.phase("blend"):
+            return name, blend.to_bytes(stack.bake_drone(plan, curves, data['initials'], chunk_frames))
+
+    max_workers = min(len(drones), multiprocessing.cpu_count())
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for c0 in range(0, len(frames), chunk):
+            chunk_frames = frames[c0:c0 + chunk]
+            final = c0 + chunk >= len(frames)
+            plan = stack.compile_layers(sample_opacities(sc, opacity_fcurves, chunk_frames), modes, enabled)
+            frames_arr = np.array(chunk_frames, dtype=np.float32)
+
+            futures = [executor.submit(bake_chunk, name, data, chunk_frames, plan)
+                       for name, data in drones.items()]
+            for future in concurrent.futures.as_completed(futures):
+                name, rgb = future.result()
+                for target in [name] + twins.get(name, []):
+                    if target in store: store.write(target, rgb, offset + c0)
+                with prof.phase("compress"):
+                    compressors[name].push(frames_arr, rgb.astype(np.float32) / 255.0, final)
+            yield c0 + len(chunk_frames)
+
+    with prof.phase("compress"):
+        return {name: comp.finish() for name, comp in compressors.items()}
+
+def progress_steps(prof, label, total, steps):
+    """
+    Re-yields the done counts of a bake generator as (label, done, total)
+    progress and returns its result. Only the work between yields counts
+    towards the 'bake' phase.
+    """
+    try:
+        while True:
+            with prof.phase("bake"):
+                try: done = next(steps)
+                except StopIteration as stop: return stop.value
+            yield label, done, total
+    finally:
+        steps.close()
+
+def redraw_bake_panel(context):
+    for area in (context.screen.areas if context.screen else ()):
+        if area.type == 'VIEW_3D': area.tag_redraw()
 
 class LIGHTINGMOD_OT_bake_colors(bpy.types.Operator):
     bl_idname = "lightingmod.bake_colors"
@@ -80,17 +361,39 @@ class LIGHTINGMOD_OT_bake_colors(bpy.types.Operator):
         min=0.0, max=1.0, precision=4
     )
 
-    def execute(self, context):
+    def bake_steps(self, context):
+        """
+        The bake as a generator: yields (label, done, total) progress between
+        batches and returns the operator result. execute() runs it to the
+        end, invoke() time-slices it on a timer.
+        """
         sc = context.scene
+        self.written = 0
+        # Sequential phases are laps; phases on worker threads add up thread time
+        prof = profiling.PhaseTimer()
         start, end = sc.frame_start, sc.frame_end
-        frames = list(range(start, end + 1))
-        
-        utils.baked_colors.clear()
+        full_len = end - start + 1
+
+        # Optional frame window (clamped to the scene range) and group subset
+        window = None
+        if sc.bake_use_window:
+            window = (max(start, sc.bake_window_start), min(end, sc.bake_window_end))
+            if window[0] > window[1]:
+                self.report({'ERROR'}, "Bake window is outside the scene frame range")
+                return {'CANCELLED'}
+        bake_start, bake_end = window or (start, end)
+        frames = list(range(bake_start, bake_end + 1))
+
+        group = active_group_names(sc) if sc.bake_group_only else None
+        if group is not None and not group:
+            self.report({'ERROR'}, "Active group is empty")
+            return {'CANCELLED'}
+        partial = window is not None or group is not None
         
         # 1. IDENTIFY OBJECTS & DATA
         obj_fcurves = {}
-        for o in bpy.data.objects:
-            if not (o.get("md_sphere") and o.type == 'MESH'):
+        for o in registry.drones.all():
+            if group is not None and o.name not in group:
                 continue
             
             fc_map = {}
@@ -117,20 +420,19 @@ class LIGHTINGMOD_OT_bake_colors(bpy.types.Operator):
                     initial_vals[i+1] = [float(val)] * 3
                 
             obj_fcurves[o.name] = {'fc_map': fc_map, 'initials': initial_vals}
+        prof.lap("discovery")
 
         # 2. PREPARE SCENE DATA
-        opacity_fcurves = {}
-        if sc.animation_data and sc.animation_data.action:
-            for fc in sc.animation_data.action.fcurves:
-                m = re.match(r'ly_layers\[(\d+)\]\.opacity', fc.data_path)
-                if m: opacity_fcurves[int(m.group(1))] = fc
+        opacity_fcurves = find_opacity_fcurves(sc)
+
+        # Chunked bakes sample opacities per chunk instead of up front
+        chunk = sc.bake_chunk_frames if sc.bake_engine == 'NUMPY' else 0
+        chunked = 0 < chunk < len(frames)
+        opacity_arr = None if chunked else sample_opacities(sc, opacity_fcurves, frames)
 
         layer_configs = []
         for i, layer in enumerate(sc.ly_layers):
-            if i in opacity_fcurves:
-                ops = [opacity_fcurves[i].evaluate(f) for f in frames]
-            else:
-                ops = [layer.opacity] * len(frames)
+            ops = None if chunked else opacity_arr[:, i]
             
             layer_configs.append({
                 'idx': i,
@@ -141,6 +443,55 @@ class LIGHTINGMOD_OT_bake_colors(bpy.types.Operator):
             })
 
         any_solo = any(l['solo'] for l in layer_configs)
+        prof.lap("opacity")
+
+        # BAKED COLOR STORE: reuse the on-disk cache after a reload
+        color_key = bake_color_key(sc, opacity_fcurves)
+        if sc.bake_incremental:
+            load_baked_colors(sc, color_key)
+        elif not partial:
+            utils.baked_colors.clear()
+        utils.baked_colors.set_range(start, full_len)
+
+        # DIRTY TRACKING: only drones whose inputs changed since their last bake
+        scene_key = fingerprint.digest(color_key, round(self.tolerance, 6), sc.bake_compression)
+
+        fingerprints = {}
+        todo = {}
+        for name, data in obj_fcurves.items():
+            fp = drone_fingerprint(scene_key, data['fc_map'], data['initials'])
+            fingerprints[name] = fp
+            o = bpy.data.objects[name]
+            clean = (sc.bake_incremental and o.get(FINGERPRINT_PROP) == fp
+                     and name in utils.baked_colors and has_color_curves(o))
+            if not clean: todo[name] = data
+        skipped = len(obj_fcurves) - len(todo)
+
+        if not partial:
+            for name in [n for n in utils.baked_colors if n not in obj_fcurves]:
+                del utils.baked_colors[name]
+
+        # DEDUPLICATION: drones with identical layer keys and initial values are
+        # evaluated once and the result fans out to all of them
+        unique = {}
+        twins = {}
+        for name in todo:
+            sig = timeline_signature(name, fingerprints[name], todo[name]['fc_map'])
+            first = unique.setdefault(sig, name)
+            if first != name: twins.setdefault(first, []).append(name)
+        evaluate = {name: todo[name] for name in unique.values()}
+
+        n_curves, n_keys = count_input_keys(fc for d in evaluate.values()
+                                            for chans in d['fc_map'].values() for fc in chans.values())
+        n_op_curves, n_op_keys = count_input_keys(opacity_fcurves.values())
+        prof.count("drones", len(obj_fcurves))
+        prof.count("baked", len(todo))
+        prof.count("unique", len(evaluate))
+        prof.count("skipped", skipped)
+        prof.count("frames", len(frames))
+        prof.count("curves_sampled", n_curves + n_op_curves)
+        prof.count("keys_in", n_keys + n_op_keys)
+        prof.lap("dirty_check")
 
         # 3. WORKER FUNCTION
         def bake_worker(obj_name, data_pack):
@@ -184,92 +535,254 @@ class LIGHTINGMOD_OT_bake_colors(bpy.types.Operator):
                 
             return obj_name, final_colors
 
-        # 4. RUN THREADS
-        wm = context.window_manager
-        wm.progress_begin(0, len(obj_fcurves))
-        
-        max_workers = min(len(obj_fcurves), multiprocessing.cpu_count())
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = [executor.submit(bake_worker, name, data) for name, data in obj_fcurves.items()]
-            
-            for i, future in enumerate(concurrent.futures.as_completed(futures), start=1):
-                name, data = future.result()
-                utils.baked_colors[name] = data
-                if i % 10 == 0: wm.progress_update(i)
-        
-        wm.progress_end()
-        
-        # 5. BULK WRITE KEYFRAMES (With Two-Pass Compression)
-        print(f"Writing keyframes to F-Curves (Tolerance: {self.tolerance})...")
-        wm.progress_begin(0, len(utils.baked_colors))
-        
+        # Vectorized variant: whole timeline per layer instead of per frame
+        layer_enabled = blend.layer_enabled_mask([l['mute'] for l in layer_configs],
+                                                 [l['solo'] for l in layer_configs])
+        layer_modes = [l['blend'] for l in layer_configs]
+
+        # LAYER PLAN: inert layers and frame spans are skipped, constant layers folded
+        plan = None if chunked else stack.compile_layers(opacity_arr, layer_modes, layer_enabled)
+
+        def bake_worker_numpy(obj_name, data_pack):
+            with prof.phase("export"):
+                curves = export_layer_curves(data_pack['fc_map'], frames)
+            with prof.phase("blend"):
+                rgb = stack.bake_drone(plan, curves, data_pack['initials'], frames)
+                return obj_name, blend.to_bytes(rgb)
+
+        # Event-driven variant: breakpoints and adaptive probes only, keyed directly
+        event_keys = {}
+        if sc.bake_engine == 'EVENTS':
+            op_curves = {i: export_fcurve(fc, frames) for i, fc in opacity_fcurves.items()}
+            scene_breaks = events.scene_breakpoints(op_curves, opacity_arr, frames)
+
+        def bake_worker_events(obj_name, data_pack):
+            with prof.phase("export"):
+                curves = export_layer_curves(data_pack['fc_map'], frames)
+            with prof.phase("blend"):
+                keys, n_eval = events.bake_drone_keys(curves, data_pack['initials'], frames, opacity_arr,
+                                                      layer_modes, layer_enabled, scene_breaks, self.tolerance,
+                                                      sc.bake_compression == 'JOINT')
+            prof.increment("frames_evaluated", n_eval)
+            event_keys[obj_name] = keys
+            # The store gets the colors the keys play back
+            return obj_name, np.rint(compress.expand_keys(keys, frames) * 255.0)
+
+        worker = {'NUMPY': bake_worker_numpy, 'EVENTS': bake_worker_events}.get(sc.bake_engine, bake_worker)
+
+        # Unique drones are baked, stored and keyed in batches; a cancelled
+        # bake stops between batches
+        batch_size = max(1, multiprocessing.cpu_count())
+        names = list(evaluate)
+        batches = [names[i:i + batch_size] for i in range(0, len(names), batch_size)]
         frames_arr = np.array(frames, dtype=np.float32)
-        
-        for i, (obj_name, color_data) in enumerate(utils.baked_colors.items()):
-            o = bpy.data.objects.get(obj_name)
-            if not o: continue
-            
-            if not o.animation_data: o.animation_data_create()
-            if not o.animation_data.action: 
-                o.animation_data.action = bpy.data.actions.new(name=f"{obj_name}_color")
-            
-            action = o.animation_data.action
-            
-            # Convert to float 0-1
-            col_arr = np.array(color_data, dtype=np.float32) / 255.0
-            
-            # Remove existing color curves
-            existing_curves = [fc for fc in action.fcurves if fc.data_path == "color"]
-            for fc in existing_curves: action.fcurves.remove(fc)
-                
-            for channel in range(3):
-                fc = action.fcurves.new(data_path="color", index=channel)
-                
-                channel_vals = col_arr[:, channel]
-                
-                # --- TWO-PASS COMPRESSION ---
-                if self.tolerance > 0.0:
-                    # Pass 1: Find Critical Points (Slope Changes)
-                    critical_idx = find_critical_indices(channel_vals)
-                    
-                    simplified_segments = []
-                    
-                    # Pass 2: Run RDP on segments BETWEEN critical points
-                    for k in range(len(critical_idx) - 1):
-                        idx_start = critical_idx[k]
-                        idx_end   = critical_idx[k+1]
-                        
-                        seg_frames = frames_arr[idx_start : idx_end + 1]
-                        seg_vals   = channel_vals[idx_start : idx_end + 1]
-                        
-                        # Compress monotonic segment
-                        seg_res = rdp_simplify(seg_frames, seg_vals, self.tolerance)
-                        
-                        if k > 0:
-                            simplified_segments.append(seg_res[1:])
+        keys_out = [0, 0, 0]
+
+        def write_drones(batch, results, streamed):
+            # Row, color curves and fingerprint of a drone always change together
+            for first in batch:
+                data = results.pop(first, None)
+                if data is not None:
+                    data = np.clip(np.asarray(data), 0, 255).astype(np.uint8)
+                if first in streamed:
+                    # Chunked bakes stored and compressed while streaming; event bakes key directly
+                    channel_keys = streamed.pop(first)
+                else:
+                    with prof.phase("compress"):
+                        # Convert to float 0-1
+                        col_arr = data.astype(np.float32) / 255.0
+                        if sc.bake_compression == 'JOINT':
+                            channel_keys = compress.simplify_rgb(frames_arr, col_arr, self.tolerance)
                         else:
-                            simplified_segments.append(seg_res)
-                    
-                    if simplified_segments:
-                        final_data = np.vstack(simplified_segments)
-                    else:
-                        final_data = np.column_stack((frames_arr, channel_vals))
-                    
+                            channel_keys = compress.simplify_channels(frames_arr, col_arr, self.tolerance)
+
+                for obj_name in [first] + twins.get(first, []):
+                    if data is not None:
+                        # Windowed results are spliced into the full-range rows; drones
+                        # without a row keep no baked colors until a full bake
+                        with prof.phase("store"):
+                            if window is None:
+                                utils.baked_colors[obj_name] = data
+                            elif obj_name in utils.baked_colors:
+                                utils.baked_colors.write(obj_name, data, bake_start - start)
+
+                    o = bpy.data.objects.get(obj_name)
+                    if not o: continue
+                    with prof.phase("write"):
+                        write_color_curves(o, channel_keys, window)
+                    for ch, keys in enumerate(channel_keys): keys_out[ch] += len(keys)
+
+                    if window is None:
+                        o[FINGERPRINT_PROP] = fingerprints[obj_name]
+                    elif FINGERPRINT_PROP in o:
+                        # Keys outside the window may be stale; force the next full bake
+                        del o[FINGERPRINT_PROP]
+                    self.written += 1
+
+        print(f"Baking {len(todo)} drones, {len(evaluate)} unique (Tolerance: {self.tolerance})...")
+        # Once every chunk has streamed the store is complete, even if writing keys is cancelled
+        streamed_all = False
+        try:
+            if todo and (chunked or sc.bake_engine == 'PROCESS'):
+                streamed, results = {}, {}
+                if chunked:
+                    # 4. RUN CHUNKS: colors stream into the store, keys into per-drone compressors
+                    store = utils.baked_colors
+                    if not partial:
+                        store.create_on_disk(bake_buffer_path(color_key), list(obj_fcurves), start, full_len)
+                    elif window is None:
+                        for name in todo:
+                            if name not in store: store[name] = np.zeros((full_len, 3), dtype=np.uint8)
+                    steps = run_chunked_bake(evaluate, sc, opacity_fcurves, frames, layer_modes, layer_enabled,
+                                             chunk, self.tolerance, sc.bake_compression == 'JOINT',
+                                             store, bake_start - start, prof, twins)
+                    streamed = yield from progress_steps(prof, "Baking frames", len(frames), steps)
+                    streamed_all = True
                 else:
-                    final_data = np.column_stack((frames_arr, channel_vals))
-                
-                # Write
-                fc.keyframe_points.add(len(final_data))
-                fc.keyframe_points.foreach_set('co', final_data.flatten())
-            
-            if i % 50 == 0: wm.progress_update(i)
+                    # 4. RUN PROCESSES
+                    exported = []
+                    for batch in batches:
+                        with prof.phase("export"):
+                            exported += [(name, export_layer_curves(evaluate[name]['fc_map'], frames),
+                                          evaluate[name]['initials']) for name in batch]
+                        yield "Exporting drones", len(exported), len(evaluate)
+                    workers = sc.bake_workers or multiprocessing.cpu_count()
+                    steps = run_process_bake(exported, frames, opacity_arr, layer_modes, layer_enabled, workers)
+                    results, used_pool = yield from progress_steps(prof, "Baking drones", len(evaluate), steps)
+                    prof.count("workers", workers)
+                    prof.count("process_pool", used_pool)
+                    del exported
+                    if workers > 1 and not used_pool:
+                        self.report({'WARNING'}, "Process pool unavailable, baked serially")
 
-        wm.progress_end()
-        self.report({'INFO'}, "Bake Complete")
+                # 5. BULK WRITE KEYFRAMES
+                for batch in batches:
+                    write_drones(batch, results, streamed)
+                    yield "Writing drones", self.written, len(todo)
+            elif todo:
+                # 4. RUN THREADS, then key each batch straight away
+                with concurrent.futures.ThreadPoolExecutor(max_workers=batch_size) as executor:
+                    for batch in batches:
+                        with prof.phase("bake"):
+                            results = dict(executor.map(lambda name: worker(name, evaluate[name]), batch))
+                        write_drones(batch, results, event_keys)
+                        yield "Baking drones", self.written, len(todo)
+        except GeneratorExit:
+            if chunked and todo and not streamed_all:
+                # The store holds a partly streamed bake; reload the last cache lazily instead
+                utils.baked_colors.discard()
+            else:
+                save_baked_colors(color_key)
+            raise
+        prof.lap()
+
+        cache = save_baked_colors(color_key)
+        if cache: print(f"Baked colors cached: {cache}")
+        prof.lap("cache")
+
+        # PROFILE: compression ratio is samples per written key, per channel
+        samples = len(todo) * len(frames)
+        for ch, n in zip("rgb", keys_out):
+            prof.count(f"keys_out_{ch}", n)
+            prof.count(f"ratio_{ch}", round(samples / n, 2) if n else 0.0)
+        total = prof.elapsed()
+        utils.last_bake_counters.clear()
+        utils.last_bake_counters.update(prof.counters)
+        print(f"Bake profile ({total:.2f}s):")
+        prof.report()
+        if sc.bake_write_profile and bake_profile_path():
+            config = {'engine': sc.bake_engine, 'compression': sc.bake_compression,
+                      'tolerance': self.tolerance, 'chunk_frames': chunk, 'incremental': sc.bake_incremental,
+                      'window': window, 'group_only': sc.bake_group_only, 'total': total}
+            profiling.write_profile(bake_profile_path(), "bake", config, prof,
+                                    blender=bpy.app.version_string)
+
+        ratios = "/".join(f"{prof.counters[f'ratio_{ch}']:g}" for ch in "rgb")
+        self.report({'INFO'}, f"Bake Complete: {len(todo)} re-baked ({len(evaluate)} unique), "
+                              f"{skipped} unchanged skipped "
+                              f"in {total:.2f}s ({prof.summary(['discovery', 'bake', 'compress', 'write'])}; "
+                              f"R/G/B ratio {ratios})")
         return {'FINISHED'}
 
+    def execute(self, context):
+        if utils.bake_progress:
+            self.report({'ERROR'}, "A bake is already running")
+            return {'CANCELLED'}
+        wm = context.window_manager
+        wm.progress_begin(0, 100)
+        steps = self.bake_steps(context)
+        try:
+            while True:
+                _, done, total = next(steps)
+                wm.progress_update(int(100 * done / max(1, total)))
+        except StopIteration as stop:
+            return stop.value
+        finally:
+            wm.progress_end()
+
+    # --- Modal (UI) bake: ESC cancels between batches ---
+    def invoke(self, context, event):
+        if utils.bake_progress:
+            self.report({'ERROR'}, "A bake is already running")
+            return {'CANCELLED'}
+        self._steps = self.bake_steps(context)
+        wm = context.window_manager
+        wm.progress_begin(0, 100)
+        self._timer = wm.event_timer_add(BAKE_TIMER_INTERVAL, window=context.window)
+        wm.modal_handler_add(self)
+        utils.bake_progress.update(label="Preparing", done=0, total=0, rate=0.0, eta=None,
+                                   t0=time.perf_counter())
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        # finish() runs on every way out of the bake, exceptions included
+        running = False
+        try:
+            if event.type == 'ESC' and event.value == 'PRESS':
+                self._steps.close()
+                # FINISHED, not CANCELLED, so the drones written so far get an undo step
+                self.report({'WARNING'}, f"Bake cancelled: {self.written} drones re-baked, "
+                                         "the rest keep their previous colors")
+                return {'FINISHED'}
+            running = True
+            if event.type != 'TIMER' or event.timer is not self._timer:
+                return {'PASS_THROUGH'} if event.type in BAKE_PASS_EVENTS else {'RUNNING_MODAL'}
+
+            slice_end = time.perf_counter() + BAKE_TIME_SLICE
+            running = False
+            try:
+                while time.perf_counter() < slice_end:
+                    self.update_progress(context, *next(self._steps))
+            except StopIteration as stop:
+                return stop.value
+            redraw_bake_panel(context)
+            running = True
+            return {'RUNNING_MODAL'}
+        finally:
+            if not running: self.finish(context)
+
+    def update_progress(self, context, label, done, total):
+        p = utils.bake_progress
+        now = time.perf_counter()
+        # Throughput and ETA are per stage, stages count different units
+        if p['label'] != label: p.update(label=label, t0=now)
+        elapsed = now - p['t0']
+        rate = done / elapsed if elapsed > 0 else 0.0
+        p.update(done=done, total=total, rate=rate, eta=(total - done) / rate if rate > 0 else None)
+        context.window_manager.progress_update(int(100 * done / max(1, total)))
+
+    def finish(self, context):
+        wm = context.window_manager
+        wm.event_timer_remove(self._timer)
+        wm.progress_end()
+        utils.bake_progress.clear()
+        redraw_bake_panel(context)
+
 classes = (LIGHTINGMOD_OT_bake_colors,)
 def register():
     for cls in classes: bpy.utils.register_class(cls)
+    bpy.app.handlers.load_post.append(_on_load_post)
 def unregister():
+    if _on_load_post in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(_on_load_post)
     for cls in reversed(classes): bpy.utils.unregister_class(cls)
\ No newline at end of file
@@ -1,11 +1,13 @@
 import bpy
+import concurrent.futures
+import multiprocessing
 import os
-import json
-from .. import utils
-
-# Define your custom property names
-METADATA_SPHERE = "md_sphere"
-METADATA_EMPTY = "md_empty"
+import time
+import numpy as np
+from .. import registry, utils
+from ..registry import METADATA_EMPTY
+from .baking import load_baked_colors, sample_fcurve
+from lightingmod_core import csvpatch, showfile, transfer
 
 class LIGHTINGMOD_OT_swap_batch_colors(bpy.types.Operator):
     bl_idname = "lightingmod.swap_batch_colors"
@@ -79,54 +81,108 @@ class LIGHTINGMOD_OT_export_csv_colors(bpy.types.Operator):
     bl_idname = "lightingmod.export_csv_colors"
     bl_label  = "Overwrite CSV Colors"
     def execute(self, context):
-        sc = context.scene; folder = bpy.path.abspath(sc.export_folder); start = sc.frame_start
-        if not utils.baked_colors:
+        sc = context.scene; folder = bpy.path.abspath(sc.export_folder)
+        if not load_baked_colors(sc):
             self.report({'ERROR'}, "No baked colors found. Run 'Bake' first.")
             return {'CANCELLED'}
-        
-        for name, color_list in utils.baked_colors.items():
-            path = os.path.join(folder, f"drone-{name}.csv")
-            if not os.path.exists(path): continue
-            
-            lines = [l.rstrip('\n') for l in open(path)]
-            out = []
-            for idx, line in enumerate(lines):
-                cols = line.split('\t')
-                f = start + idx
-                if 0 <= idx < len(color_list):
-                    rgb = color_list[idx]
-                    if len(cols) < 7: cols += [''] * (7 - len(cols))
-                    cols[-3:] = [str(c) for c in rgb]
-                out.append('\t'.join(cols))
-            
-            with open(path, 'w') as f: f.write('\n'.join(out))
-            
-        self.report({'INFO'}, "CSV colors updated")
+
+        jobs = [(name, os.path.join(folder, f"drone-{name}.csv")) for name in utils.baked_colors]
+        jobs = [(name, path) for name, path in jobs if os.path.exists(path)]
+        missing = len(utils.baked_colors) - len(jobs)
+
+        # Files are streamed through temp files in parallel; I/O bound, so more threads than cores
+        t0 = time.perf_counter()
+        workers = sc.export_workers or min(32, multiprocessing.cpu_count() + 4)
+        changed = errors = total_bytes = 0
+        print(f"--- Patching CSV colors ({len(jobs)} files, {workers} threads) ---")
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(csvpatch.patch_file, path, utils.baked_colors[name]): name
+                       for name, path in jobs}
+            for fut in concurrent.futures.as_completed(futures):
+                name = futures[fut]
+                try:
+                    did_change, secs, size = fut.result()
+                except OSError as e:
+                    errors += 1
+                    print(f"  {name}: FAILED ({e})")
+                    continue
+                changed += did_change; total_bytes += size
+                print(f"  {name}: {'updated' if did_change else 'unchanged'} in {secs * 1000:.1f} ms")
+        elapsed = time.perf_counter() - t0
+
+        rate = total_bytes / 1e6 / max(elapsed, 1e-9)
+        msg = (f"CSV colors: {changed} updated, {len(jobs) - changed - errors} unchanged, {missing} missing "
+               f"in {elapsed:.2f}s ({rate:.1f} MB/s, {len(jobs) / max(elapsed, 1e-9):.0f} files/s)")
+        if errors:
+            self.report({'WARNING'}, f"{msg}; {errors} failed, see System Console")
+        else:
+            self.report({'INFO'}, msg)
         return {'FINISHED'}
 
+def color_transfer_keys(drone):
+    """
+    (frames, rgb) at every key time of the drone's color curves, or None.
+    Key times come from one foreach_get per curve and the curves are
+    evaluated in NumPy at all of them at once.
+    """
+    ad = drone.animation_data
+    if not ad or not ad.action: return None
+    fcurves = [fc for fc in ad.action.fcurves if fc.data_path == "color" and fc.array_index < 3]
+    if not fcurves: return None
+
+    times = []
+    for fc in fcurves:
+        buf = np.empty(len(fc.keyframe_points) * 2, dtype=np.float32)
+        fc.keyframe_points.foreach_get('co', buf)
+        times.append(buf[0::2])
+    frames = np.unique(np.concatenate(times).astype(np.int64))
+    if not len(frames): return None
+
+    rgb = np.zeros((len(frames), 3))
+    for fc in fcurves:
+        rgb[:, fc.array_index] = sample_fcurve(fc, frames.astype(np.float64))
+    return frames, rgb
+
+def merge_transfer_keys(old, new):
+    """Keys of two drones exported under the same ID; `new` wins on shared frames."""
+    frames, first = np.unique(np.concatenate((new[0], old[0])), return_index=True)
+    return frames, np.concatenate((new[1], old[1]))[first]
+
 class LIGHTINGMOD_OT_export_color_transfer(bpy.types.Operator):
     bl_idname = "lightingmod.export_color_transfer"
     bl_label  = "Export Colour Transfer"
-    bl_description = "Export Object Color to JSON (1:1 ID Mapping)"
+    bl_description = "Export Object Color to JSON or a binary show file (1:1 ID Mapping)"
 
     def execute(self, context):
-        data = {}
+        sc = context.scene
         
         # 1. Start with Selected Empties
         selected_empties = [o for o in context.selected_objects]
         if not selected_empties:
             self.report({'ERROR'}, 'Please select the Empties')
             return {'CANCELLED'}
+
+        folder = bpy.path.abspath(sc.export_folder)
+        if not os.path.exists(folder):
+            self.report({'ERROR'}, f"Export folder not found: {folder}")
+            return {'CANCELLED'}
         
-        # 2. Build Lookup Table
-        prefetch = {}
-        all_meshes = [o for o in bpy.data.objects if o.type == 'MESH']
-        for obj in all_meshes:
-            if METADATA_SPHERE in obj:
-                prefetch[obj[METADATA_SPHERE]] = obj
+        # --- FILENAME LOGIC ---
+        filename = sc.export_filename.strip()
+        if not filename: filename = "color_transfer"
+        if sc.export_format == 'BINARY': ext = showfile.EXTENSION
+        else: ext = transfer.COMPRESSIONS[sc.export_compression][1]
+        if ext != ".txt" and filename.lower().endswith(".txt"): filename = filename[:-len(".txt")]
+        if not filename.lower().endswith(ext): filename += ext
+        export_path = os.path.join(folder, filename)
+        
+        # 2. Lookup Table: the shared drone registry, rebuilt once on a miss
+        rebuilt = False
 
         print(f"--- Exporting Color Transfer ({len(selected_empties)} empties) ---")
 
+        # Drones by output ID; drones sharing an ID are merged before writing
+        outputs = {}
         for obj in selected_empties:
             
             # 3. Check for Empty Metadata
@@ -140,7 +196,10 @@ class LIGHTINGMOD_OT_export_color_transfer(bpy.types.Operator):
                 continue
                 
             drone_lookup_name = str(raw_drone_val) + 'S'
-            drone = prefetch.get(drone_lookup_name)
+            drone = registry.drones.sphere(drone_lookup_name)
+            if not drone and not rebuilt:
+                registry.drones.invalidate(); rebuilt = True
+                drone = registry.drones.sphere(drone_lookup_name)
             
             if not drone:
                 print(f"Skipping {obj.name}: Target drone '{drone_lookup_name}' not found")
@@ -150,59 +209,33 @@ class LIGHTINGMOD_OT_export_color_transfer(bpy.types.Operator):
             # "1E" -> "1"
             # "25E" -> "25"
             empty_name = str(obj[METADATA_EMPTY]).split('E')[0]
+            outputs.setdefault(empty_name, []).append(drone)
 
-            # 6. Extract Animation Data
-            if not drone.animation_data or not drone.animation_data.action:
-                continue
-            
-            action = drone.animation_data.action
-            
-            fcurves = [fc for fc in action.fcurves if fc.data_path == "color"]
-            
-            if fcurves:
-                unique_frames = set()
-                for fc in fcurves:
-                    for kp in fc.keyframe_points:
-                        unique_frames.add(int(kp.co[0]))
-                
-                frames_sorted = sorted(list(unique_frames))
-                
-                for f in frames_sorted:
-                    r = 0.0; g = 0.0; b = 0.0
-                    for fc in fcurves:
-                        val = fc.evaluate(f)
-                        if fc.array_index == 0: r = val
-                        elif fc.array_index == 1: g = val
-                        elif fc.array_index == 2: b = val
-                    
-                    data.setdefault(empty_name, {})[f] = [r, g, b, 1.0]
-
-        if not data:
-            self.report({'WARNING'}, "Export empty. Check System Console.")
-            return {'CANCELLED'}
-
-        # Write File
-        sc = context.scene
-        folder = bpy.path.abspath(sc.export_folder)
-        if not os.path.exists(folder):
-            self.report({'ERROR'}, f"Export folder not found: {folder}")
-            return {'CANCELLED'}
-        
-        # --- FILENAME LOGIC ---
-        filename = sc.export_filename.strip()
-        if not filename: filename = "color_transfer"
-        if not filename.lower().endswith(".txt"): filename += ".txt"
-            
-        export_path = os.path.join(folder, filename)
-        
+        # 6. Stream each drone's keys to the file as soon as they are evaluated
+        written = 0
         try:
-            with open(export_path, "w") as f:
-                json.dump(data, f, indent=1)
-            self.report({'INFO'}, f"Exported: {export_path}")
+            if sc.export_format == 'BINARY':
+                writer = showfile.ShowWriter(export_path)
+            else:
+                writer = transfer.TransferWriter(export_path, sc.export_compression)
+            with writer:
+                for empty_name, drones in outputs.items():
+                    keys = None
+                    for drone in drones:
+                        k = color_transfer_keys(drone)
+                        if k is not None: keys = k if keys is None else merge_transfer_keys(keys, k)
+                    if keys is None: continue
+                    writer.add(empty_name, *keys)
+                    written += 1
+                if not written: writer.abort()
         except Exception as e:
             self.report({'ERROR'}, f"Write Error: {e}")
             return {'CANCELLED'}
-            
+
+        if not written:
+            self.report({'WARNING'}, "Export empty. Check System Console.")
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Exported: {export_path}")
         return {'FINISHED'}
 
 classes = (
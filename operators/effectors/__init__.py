@@ -1,4 +1,4 @@
-from . import gradient, sparkle, domain, movie, offset, management, temporal
+from . import gradient, sparkle, domain, movie, offset, management, temporal, schedule
 
 classes = (
     gradient.LIGHTINGMOD_OT_draw_gradient,
@@ -25,6 +25,8 @@ classes = (
     temporal.LIGHTINGMOD_OT_temporal_sparkle,
     temporal.LIGHTINGMOD_OT_stage_add,
     temporal.LIGHTINGMOD_OT_stage_remove,
+
+    schedule.LIGHTINGMOD_OT_replay_schedule,
 )
 
 def register():
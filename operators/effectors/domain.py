@@ -1,6 +1,108 @@
 import bpy
 import mathutils
+import numpy as np
+from mathutils.bvhtree import BVHTree
 from ... import utils
+from ..baking import sample_fcurve
+from .keys import merge_color_keys, remove_color_range
+from lightingmod_core import compress, domain
+
+# Object types that can be turned into a mesh volume
+VOLUME_TYPES = {'MESH', 'CURVE', 'SURFACE', 'META', 'FONT'}
+
+# Largest color error of the simplified falloff keys (half an 8-bit step)
+FALLOFF_TOLERANCE = 0.5 / 255
+
+def curve_positions(o, frames):
+    """
+    (frames, 3) world positions of a drone read straight from its location
+    F-Curves, or None when something besides them moves it (parent,
+    constraints, drivers, NLA).
+    """
+    if o.parent or len(o.constraints): return None
+    ad = o.animation_data
+    if ad and (len(ad.nla_tracks) or any(d.data_path in ('location', 'delta_location') for d in ad.drivers)):
+        return None
+    pos = np.tile(np.array(o.location, dtype=np.float64), (len(frames), 1))
+    if ad and ad.action:
+        for fc in ad.action.fcurves:
+            if fc.mute: continue
+            if fc.data_path == 'delta_location': return None
+            if fc.data_path == 'location': pos[:, fc.array_index] = sample_fcurve(fc, frames)
+    return pos + np.array(o.delta_location, dtype=np.float64)
+
+def sample_positions(sc, drones, frames, domain_obj=None):
+    """
+    (frames, drones, 3) world positions and (frames, 4, 4) world matrices
+    of `domain_obj` (None without one). Drones driven only by their own
+    location curves are sampled from them; the rest, and the domain, are
+    read after one frame_set per frame, shared by all of them.
+    """
+    pos = np.empty((len(frames), len(drones), 3))
+    evaluated = []
+    for d, o in enumerate(drones):
+        p = curve_positions(o, frames.astype(np.float64))
+        if p is None: evaluated.append(d)
+        else: pos[:, d] = p
+    matrices = None if domain_obj is None else np.empty((len(frames), 4, 4))
+    if evaluated or domain_obj is not None:
+        current = sc.frame_current
+        for i, f in enumerate(frames.tolist()):
+            sc.frame_set(f)
+            for d in evaluated: pos[i, d] = drones[d].matrix_world.translation
+            if domain_obj is not None: matrices[i] = domain_obj.matrix_world
+        sc.frame_set(current)
+    return pos, matrices
+
+def is_animated(o):
+    return bool(o.animation_data or o.parent or len(o.constraints))
+
+def build_volume(dom, depsgraph, resolution, reach=0.0):
+    """
+    Signed distance grid of a closed mesh in its local space: (grid, axes),
+    or None when it has no faces. Inside is found by casting a ray along x
+    through every row of voxels (even-odd rule). Exact distances (BVH
+    nearest-point queries) are only taken within `reach` local units of
+    the surface plus two voxels; farther voxels just hold that band's
+    edge, with the sign.
+    """
+    ev = dom.evaluated_get(depsgraph)
+    mesh = ev.to_mesh()
+    try:
+        mesh.calc_loop_triangles()
+        verts = [v.co.copy() for v in mesh.vertices]
+        tris = [tuple(t.vertices) for t in mesh.loop_triangles]
+    finally:
+        ev.to_mesh_clear()
+    if not tris: return None
+    bvh = BVHTree.FromPolygons(verts, tris)
+    co = np.array(verts)
+    lo, hi = co.min(axis=0), co.max(axis=0)
+    pad = reach + 2 * float((hi - lo).max()) / max(1, resolution - 1)
+    axes = domain.grid_axes(lo, hi, resolution, pad)
+    xs, ys, zs = axes
+    step = xs[1] - xs[0] if len(xs) > 1 else 1.0
+
+    inside = np.zeros((len(xs), len(ys), len(zs)), dtype=bool)
+    x0, x1 = xs[0] - step, xs[-1] + step
+    direction = mathutils.Vector((1, 0, 0))
+    for j, y in enumerate(ys):
+        for k, z in enumerate(zs):
+            # Off the voxel centers, so rows don't run along mesh edges
+            y_ray, z_ray = y + step * 1e-3, z + step * 1.7e-3
+            hits, x = [], x0
+            while x < x1:
+                loc, _, _, _ = bvh.ray_cast(mathutils.Vector((x, y_ray, z_ray)), direction, x1 - x)
+                if loc is None: break
+                hits.append(loc.x)
+                x = loc.x + step * 1e-4
+            inside[:, j, k] = domain.parity_inside(hits, xs)
+
+    band_steps = int(np.ceil(reach / step)) + 2
+    dist = np.full(inside.shape, band_steps * step)
+    for i, j, k in np.argwhere(domain.surface_band(inside, band_steps)).tolist():
+        dist[i, j, k] = bvh.find_nearest(mathutils.Vector((xs[i], ys[j], zs[k])))[3]
+    return np.where(inside, -dist, dist), axes
 
 class LIGHTINGMOD_OT_domain_effector(bpy.types.Operator):
     bl_idname="lightingmod.domain"; bl_label="Domain"
@@ -8,27 +110,54 @@ class LIGHTINGMOD_OT_domain_effector(bpy.types.Operator):
         sc=context.scene; start=sc.effector_start; end=sc.effector_end; trans=sc.effector_transition
         dom=sc.domain_object; drones=[o for o in context.selected_objects if o.get("md_sphere") and o.type=='MESH']
         if not dom: return {'CANCELLED'}
-        
-        bbox=[dom.matrix_world @ mathutils.Vector(c) for c in dom.bound_box]
-        xs=[v.x for v in bbox]; ys=[v.y for v in bbox]; zs=[v.z for v in bbox]
-        minx,maxx=min(xs),max(xs); miny,maxy=min(ys),max(ys); minz,maxz=min(zs),max(zs)
-        
+        if sc.domain_mode == 'MESH' and dom.type not in VOLUME_TYPES:
+            self.report({'WARNING'}, f"{dom.name} has no surface to use as a volume")
+            return {'CANCELLED'}
+
         prop=f"Layer_{int(sc.effector_target_layer)+1}"
-        
-        for o in drones:
-            if prop not in o.keys(): continue
-            prev=False; base=o[prop][:]
-            for f in range(start,end+1):
-                sc.frame_set(f)
-                x,y,z=o.matrix_world.to_translation()
-                inside=(minx<=x<=maxx and miny<=y<=maxy and minz<=z<=maxz)
-                if inside and not prev:
-                    r,g,b,_=sc.effector_colors[0].color if sc.effector_colors else (1,1,1,1)
-                    o[prop]=[r,g,b]; o.keyframe_insert(data_path=f'["{prop}"]',frame=f)
-                    o[prop]=base;   o.keyframe_insert(data_path=f'["{prop}"]',frame=f+trans)
-                elif not inside and prev:
-                    r,g,b,_=sc.effector_colors[0].color if sc.effector_colors else (1,1,1,1)
-                    o[prop]=[r,g,b]; o.keyframe_insert(data_path=f'["{prop}"]',frame=f-1)
-                    o[prop]=base;   o.keyframe_insert(data_path=f'["{prop}"]',frame=f-1+trans)
-                prev=inside
+        drones=[o for o in drones if prop in o.keys()]
+        if not drones or end < start: return{'FINISHED'}
+        color=sc.effector_colors[0].color[:3] if sc.effector_colors else (1,1,1)
+        width=sc.domain_falloff
+
+        # Every position (and domain transform) at once, then one bulk merge per drone
+        frames=np.arange(start, end+1)
+        positions, matrices = sample_positions(sc, drones, frames, dom if is_animated(dom) else None)
+        if matrices is None: matrices=np.broadcast_to(np.array(dom.matrix_world), (len(frames), 4, 4))
+
+        if sc.domain_mode == 'MESH':
+            scale=np.cbrt(abs(np.linalg.det(np.array(dom.matrix_world)[:3, :3]))) or 1.0
+            volume=build_volume(dom, context.evaluated_depsgraph_get(), sc.domain_resolution, width / scale)
+            if volume is None:
+                self.report({'WARNING'}, f"{dom.name} has no faces")
+                return {'CANCELLED'}
+            local, scales = domain.to_local(positions, matrices)
+            dist=domain.sample_grid(*volume, local) * scales[:, None]
+        else:
+            # World-aligned box around the domain's bounds on every frame
+            corners=np.einsum('fij,kj->fki', matrices[:, :3, :3], np.array(dom.bound_box)) + matrices[:, None, :3, 3]
+            lo, hi = corners.min(axis=1)[:, None], corners.max(axis=1)[:, None]
+            dist=domain.box_distance(positions, lo, hi) if width > 0 else None
+            inside=domain.inside_box(positions, lo, hi)
+        if dist is not None and width <= 0: inside = dist <= 0
+
+        keyed=0
+        for d, o in enumerate(drones):
+            base=o[prop][:]
+            if width > 0:
+                # Color follows the weight frame by frame, simplified back to a few keys
+                w=domain.falloff(dist[:, d], width)
+                if not w.any(): continue
+                values=np.outer(1 - w, base) + np.outer(w, color)
+                keys=compress.simplify_rgb(frames, values, FALLOFF_TOLERANCE)
+                key_frames, values = keys[0][:, 0], np.column_stack([k[:, 1] for k in keys])
+                # The falloff keys replace the whole range; older keys in between would bend it
+                remove_color_range(o, prop, start, end)
+            else:
+                key_frames, values = domain.pulse_keys(inside[:, d], start, trans, color, base)
+            if not len(key_frames): continue
+            # Simplified falloff keys only hold their error bound between straight segments
+            merge_color_keys(o, prop, key_frames, values, 'LINEAR' if width > 0 else None)
+            keyed+=1
+        self.report({'INFO'}, f"Domain keyed {keyed} of {len(drones)} drones")
         return{'FINISHED'}
@@ -2,7 +2,7 @@ import bpy
 import mathutils
 from bpy.props import FloatVectorProperty, IntProperty
 from bpy_extras import view3d_utils
-from ... import utils
+from ... import registry, utils
 from .evaluator import EffectorEvaluator
 
 class LIGHTINGMOD_OT_create_gradient_nodegroup(bpy.types.Operator):
@@ -105,9 +105,11 @@ class LIGHTINGMOD_OT_draw_gradient(bpy.types.Operator):
         if sc.effector_selection_mode == 'GROUP' and sc.drone_formations:
              if sc.drone_formations[sc.drone_formations_index].groups:
                  g = sc.drone_formations[sc.drone_formations_index].groups[sc.drone_formations[sc.drone_formations_index].groups_index]
-                 objs = [bpy.data.objects.get(d.object_name) for d in g.drones if bpy.data.objects.get(d.object_name)]
+                 objs = [o for o in map(bpy.data.objects.get, [d.object_name for d in g.drones]) if o]
+        elif sc.effector_selected_only:
+             objs = [o for o in context.selected_objects if registry.is_drone(o)]
         else:
-             objs = [o for o in (context.selected_objects if sc.effector_selected_only else bpy.data.objects) if o.get("md_sphere") and o.type=='MESH']
+             objs = registry.drones.all()
 
         for obj in objs:
             if prop not in obj.keys(): continue
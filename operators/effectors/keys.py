@@ -0,0 +1,125 @@
+import bpy
+import numpy as np
+
+# keyframe_insert replaces an existing key this close to the inserted frame
+REPLACE_THRESHOLD = 0.01
+
+# Raw enum values as foreach_get/foreach_set see them
+INTERPOLATION = {'CONSTANT': 0, 'LINEAR': 1, 'BEZIER': 2}
+HANDLE_TYPE = {'FREE': 0, 'AUTO': 1, 'VECTOR': 2, 'ALIGNED': 3, 'AUTO_CLAMPED': 4}
+
+# Keyframe attributes carried over when a curve is rewritten
+_VECTOR_ATTRS = ('co', 'handle_left', 'handle_right')
+_INT_ATTRS = ('interpolation', 'handle_left_type', 'handle_right_type', 'easing', 'type')
+_FLOAT_ATTRS = ('amplitude', 'back', 'period')
+
+def read_points(fc):
+    """Every keyframe attribute of an F-Curve as arrays."""
+    kps = fc.keyframe_points
+    n = len(kps)
+    pts = {}
+    for attr in _VECTOR_ATTRS:
+        buf = np.empty(n * 2, dtype=np.float32); kps.foreach_get(attr, buf); pts[attr] = buf.reshape(-1, 2)
+    for attr in _INT_ATTRS:
+        buf = np.empty(n, dtype=np.int32); kps.foreach_get(attr, buf); pts[attr] = buf
+    for attr in _FLOAT_ATTRS:
+        buf = np.empty(n, dtype=np.float32); kps.foreach_get(attr, buf); pts[attr] = buf
+    return pts
+
+def new_points(frames, values, interpolation=None):
+    """
+    Attributes of freshly inserted keys, following the user's keyframe
+    preferences unless an interpolation is given.
+    """
+    edit = bpy.context.preferences.edit
+    interpolation = interpolation or edit.keyframe_new_interpolation_type
+    n = len(frames)
+    co = np.column_stack((frames, values)).astype(np.float32)
+    handle = HANDLE_TYPE.get(edit.keyframe_new_handle_type, HANDLE_TYPE['AUTO_CLAMPED'])
+    return {'co': co, 'handle_left': co.copy(), 'handle_right': co.copy(),
+            'interpolation': np.full(n, INTERPOLATION.get(interpolation, 2), dtype=np.int32),
+            'handle_left_type': np.full(n, handle, dtype=np.int32),
+            'handle_right_type': np.full(n, handle, dtype=np.int32),
+            'easing': np.zeros(n, dtype=np.int32), 'type': np.zeros(n, dtype=np.int32),
+            'amplitude': np.full(n, 0.8, dtype=np.float32), 'back': np.full(n, 1.70158, dtype=np.float32),
+            'period': np.full(n, 4.1, dtype=np.float32)}
+
+def _near(x, frames):
+    """Mask of key times x within REPLACE_THRESHOLD of any of the sorted `frames`."""
+    pos = np.searchsorted(frames, x)
+    dist = np.minimum(np.abs(x - frames[np.maximum(pos - 1, 0)]),
+                      np.abs(x - frames[np.minimum(pos, len(frames) - 1)]))
+    return dist < REPLACE_THRESHOLD
+
+def _write_points(fc, pts):
+    kps = fc.keyframe_points
+    kps.clear()
+    kps.add(len(pts['co']))
+    for attr, arr in pts.items():
+        kps.foreach_set(attr, arr.ravel())
+    fc.update()
+
+def merge_curve(fc, frames, values, interpolation=None):
+    """
+    Inserts keys into an F-Curve in one pass. Existing keys keep all their
+    attributes unless a new key lands on their frame, as keyframe_insert
+    would do key by key. `frames` must be sorted.
+    """
+    if not len(frames): return
+    new = new_points(frames, values, interpolation)
+    if len(fc.keyframe_points):
+        old = read_points(fc)
+        keep = ~_near(old['co'][:, 0], frames)
+        merged = {a: np.concatenate((old[a][keep], new[a])) for a in new}
+        order = np.argsort(merged['co'][:, 0], kind='stable')
+        new = {a: v[order] for a, v in merged.items()}
+    _write_points(fc, new)
+
+def _drop_points(fc, remove):
+    """Rewrites an F-Curve without the keys `remove` selects from its key times."""
+    if not len(fc.keyframe_points): return
+    old = read_points(fc)
+    keep = ~remove(old['co'][:, 0])
+    if keep.all(): return
+    _write_points(fc, {a: v[keep] for a, v in old.items()})
+
+def remove_curve_keys(fc, frames):
+    """Deletes the keys of an F-Curve sitting on any of the sorted `frames`."""
+    if len(frames): _drop_points(fc, lambda x: _near(x, frames))
+
+def remove_curve_range(fc, start, end):
+    """Deletes the keys of an F-Curve from `start` to `end`, both included."""
+    _drop_points(fc, lambda x: (x > start - REPLACE_THRESHOLD) & (x < end + REPLACE_THRESHOLD))
+
+def merge_color_keys(obj, prop, frames, colors, interpolation=None):
+    """
+    Keys an object's `prop` color ((n, 3) colors at n sorted frames) into
+    its three F-Curves at once, creating the action and curves as needed.
+    """
+    if not len(frames): return
+    if not obj.animation_data: obj.animation_data_create()
+    if not obj.animation_data.action:
+        obj.animation_data.action = bpy.data.actions.new(name=f"{obj.name}Action")
+    action = obj.animation_data.action
+    data_path = f'["{prop}"]'
+    frames = np.asarray(frames, dtype=np.float64)
+    colors = np.asarray(colors, dtype=np.float64)
+    for i in range(3):
+        fc = action.fcurves.find(data_path=data_path, index=i)
+        if not fc: fc = action.fcurves.new(data_path=data_path, index=i)
+        merge_curve(fc, frames, colors[:, i], interpolation)
+
+def _color_curves(obj, prop):
+    action = obj.animation_data.action if obj.animation_data else None
+    if not action: return []
+    return [fc for fc in (action.fcurves.find(data_path=f'["{prop}"]', index=i) for i in range(3)) if fc]
+
+def remove_color_keys(obj, prop, frames):
+    """Deletes the keys of an object's `prop` color curves at the sorted `frames`."""
+    if not len(frames): return
+    frames = np.asarray(frames, dtype=np.float64)
+    for fc in _color_curves(obj, prop): remove_curve_keys(fc, frames)
+
+def remove_color_range(obj, prop, start, end):
+    """Deletes the keys of an object's `prop` color curves from `start` to `end`, both included."""
+    for fc in _color_curves(obj, prop): remove_curve_range(fc, start, end)
@@ -8,7 +8,7 @@ class LIGHTINGMOD_OT_apply_effectors(bpy.types.Operator):
         t=context.scene.effector_type
         if   t=='GRADIENT': return bpy.ops.lightingmod.draw_gradient('INVOKE_DEFAULT')
         elif t=='SPARKLE':  return bpy.ops.lightingmod.sparkle()
-        elif t=='TEMPORAL_SPARKLE': return bpy.ops.lightingmod.temporal_sparkle()
+        elif t=='TEMPORAL_SPARKLE': return bpy.ops.lightingmod.temporal_sparkle(dry_run=False)
         elif t=='DOMAIN':   return bpy.ops.lightingmod.domain()
         elif t=='MOVIE':    return bpy.ops.lightingmod.movie_sampler('INVOKE_DEFAULT')
         elif t=='OFFSET':   return bpy.ops.lightingmod.offset_keyframes()
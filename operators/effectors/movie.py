@@ -6,6 +6,7 @@ import sys
 # Import File Browser Helper
 from bpy_extras.io_utils import ImportHelper
 from bpy.props import StringProperty
+from ... import registry
 
 # Try to import OpenCV
 try:
@@ -74,15 +75,15 @@ class LIGHTINGMOD_OT_movie_sampler(bpy.types.Operator, ImportHelper):
             return {'CANCELLED'}
 
         # 2. IDENTIFY DRONES
-        objs = []
+        drones = []
         if sc.effector_selection_mode == 'GROUP' and sc.drone_formations:
              if sc.drone_formations[sc.drone_formations_index].groups:
                  g = sc.drone_formations[sc.drone_formations_index].groups[sc.drone_formations[sc.drone_formations_index].groups_index]
-                 objs = [bpy.data.objects.get(d.object_name) for d in g.drones if bpy.data.objects.get(d.object_name)]
+                 drones = [o for o in map(registry.drones.get, [d.object_name for d in g.drones]) if o]
+        elif sc.effector_selected_only:
+             drones = [o for o in context.selected_objects if registry.is_drone(o)]
         else:
-             objs = context.selected_objects if sc.effector_selected_only else bpy.data.objects
-
-        drones = [o for o in objs if o.get("md_sphere") and o.type=='MESH']
+             drones = registry.drones.all()
         if not drones:
             self.report({'WARNING'}, "No valid drones found")
             return {'CANCELLED'}
@@ -0,0 +1,89 @@
+import bpy
+import numpy as np
+from bpy.props import BoolProperty, IntProperty, StringProperty
+from ... import registry
+from .keys import merge_color_keys, remove_color_keys
+from lightingmod_core import sparkle
+
+# Scene property holding the last schedule of each effector kind
+SCHEDULE_PROP = "lm_effector_schedules"
+
+def drone_order(drones):
+    """Drones sorted by name, so a seed gives the same pattern whatever the selection order."""
+    return sorted(drones, key=lambda o: o.name)
+
+def store_schedule(sc, kind, prop, seed, drones, frames, who, trans, colors):
+    """
+    Saves a schedule in the .blend as compact arrays: event start frame,
+    drone index, transition and RGB per event, plus the drone names and
+    the shift its keys currently sit at.
+    """
+    if SCHEDULE_PROP not in sc: sc[SCHEDULE_PROP] = {}
+    sc[SCHEDULE_PROP][kind] = {
+        'prop': prop, 'seed': seed, 'shift': 0,
+        'drones': [o.name for o in drones],
+        'frames': np.asarray(frames, dtype=np.int32).tolist(),
+        'drone': np.asarray(who, dtype=np.int32).tolist(),
+        'trans': np.broadcast_to(np.asarray(trans, dtype=np.int32), np.shape(frames)).tolist(),
+        'colors': np.asarray(colors, dtype=np.float32).reshape(-1).tolist(),
+    }
+
+def load_schedule(sc, kind):
+    """The stored schedule of an effector kind as arrays, or None."""
+    group = sc.get(SCHEDULE_PROP, {}).get(kind)
+    if not group: return None
+    return {'prop': group['prop'], 'seed': group['seed'], 'shift': group.get('shift', 0),
+            'drones': list(group['drones']),
+            'frames': np.array(group['frames'], dtype=np.int64),
+            'drone': np.array(group['drone'], dtype=np.int64),
+            'trans': np.array(group['trans'], dtype=np.int64),
+            'colors': np.array(group['colors'], dtype=np.float64).reshape(-1, 3)}
+
+def write_schedule(drones, prop, frames, who, trans, colors, shift=0):
+    """
+    Keys a schedule into the drones' `prop` curves, one bulk merge per
+    drone; base colors are the drones' current `prop` values. Returns the
+    number of drones keyed.
+    """
+    keyed = 0
+    for o, ev in zip(drones, sparkle.group_by_drone(who, len(drones))):
+        if o is None or not len(ev) or prop not in o.keys(): continue
+        key_frames, values = sparkle.event_keys(frames[ev] + shift, trans[ev], colors[ev], o[prop][:])
+        merge_color_keys(o, prop, key_frames, values)
+        keyed += 1
+    return keyed
+
+def clear_schedule(drones, prop, frames, who, trans, shift=0):
+    """
+    Removes the keys a schedule wrote at `shift` from the drones' `prop`
+    curves, whatever other effect may have keyed on those frames since.
+    """
+    for o, ev in zip(drones, sparkle.group_by_drone(who, len(drones))):
+        if o is None or not len(ev): continue
+        key_frames, _ = sparkle.event_keys(frames[ev] + shift, trans[ev], np.zeros((len(ev), 3)), (0, 0, 0))
+        remove_color_keys(o, prop, key_frames)
+
+class LIGHTINGMOD_OT_replay_schedule(bpy.types.Operator):
+    bl_idname = "lightingmod.replay_schedule"
+    bl_label = "Replay Schedule"
+    bl_description = "Key the stored schedule of this effector again, optionally shifted in time"
+    kind: StringProperty(default='SPARKLE')
+    shift: IntProperty(name="Shift", default=0, description="Frames to move the replayed schedule by")
+    replace: BoolProperty(name="Replace", default=True,
+                          description="Remove the keys of the previous application first, so the schedule moves instead of doubling")
+
+    def execute(self, context):
+        sched = load_schedule(context.scene, self.kind)
+        if sched is None:
+            self.report({'WARNING'}, "No stored schedule; apply the effector first")
+            return {'CANCELLED'}
+        drones = [registry.drones.get(name) for name in sched['drones']]
+        missing = drones.count(None)
+        if self.replace:
+            clear_schedule(drones, sched['prop'], sched['frames'], sched['drone'], sched['trans'], sched['shift'])
+            context.scene[SCHEDULE_PROP][self.kind]['shift'] = self.shift
+        keyed = write_schedule(drones, sched['prop'], sched['frames'], sched['drone'],
+                               sched['trans'], sched['colors'], self.shift)
+        msg = f"Replayed {len(sched['frames'])} events on {keyed} drones (seed {sched['seed']}, shift {self.shift})"
+        self.report({'WARNING'} if missing else {'INFO'}, msg + (f"; {missing} drones missing" if missing else ""))
+        return {'FINISHED'}
@@ -1,31 +1,60 @@
 import bpy
 import random
+import numpy as np
 from ... import utils
+from .schedule import drone_order, store_schedule, write_schedule
+from lightingmod_core import sparkle
 
 class LIGHTINGMOD_OT_sparkle_effector(bpy.types.Operator):
     bl_idname="lightingmod.sparkle"; bl_label="Sparkle"
     def execute(self, context):
         sc=context.scene; start=sc.effector_start; end=sc.effector_end
         trans=sc.effector_transition; infl=sc.effector_influence
-        drones=[o for o in context.selected_objects if o.get("md_sphere") and o.type=='MESH']
+        drones=drone_order(o for o in context.selected_objects if o.get("md_sphere") and o.type=='MESH')
         total=len(drones); count = max(1, round(total * infl / (trans*2)))
-        cooldowns={}
         
         prop=f"Layer_{int(sc.effector_target_layer)+1}"
-        
+        seed=sc.effector_seed
+        if sc.effector_engine == 'PYTHON':
+            events = self.run_per_key(sc, drones, prop, count)
+            store_schedule(sc, 'SPARKLE', prop, seed, drones, *events)
+            return{'FINISHED'}
+
+        # Whole schedule at once, then one bulk merge per drone
+        drones=[o for o in drones if prop in o.keys()]
+        if not sc.effector_colors or not drones or end < start: return{'FINISHED'}
+        palette=np.array([list(c.color)[:3] for c in sc.effector_colors])
+        rng=np.random.default_rng(seed)
+        frames, who = sparkle.schedule(len(drones), start, np.full(end-start+1, count), trans, rng)
+        colors = palette[rng.integers(len(palette), size=len(frames))]
+        store_schedule(sc, 'SPARKLE', prop, seed, drones, frames, who, trans, colors)
+        write_schedule(drones, prop, frames, who, np.full(len(frames), trans), colors)
+        self.report({'INFO'}, f"{len(frames)} sparkles on {len(drones)} drones (seed {seed})")
+        return{'FINISHED'}
+
+    def run_per_key(self, sc, drones, prop, count):
+        """
+        Reference implementation: random.sample per frame, keyframe_insert
+        per key. Returns the events as (frames, drones, trans, colors).
+        """
+        start=sc.effector_start; end=sc.effector_end; trans=sc.effector_transition
+        rnd=random.Random(sc.effector_seed)
+        cooldowns={}; index={o.name: i for i, o in enumerate(drones)}; events=[]
         for f in range(start,end+1):
             elig=[o for o in drones if f>=cooldowns.get(o.name,start)]
             if not elig: continue
-            lit=random.sample(elig,min(count,len(elig)))
+            lit=rnd.sample(elig,min(count,len(elig)))
             for o in lit:
                 if prop not in o.keys(): continue
                 base=o[prop][:]
                 if not sc.effector_colors: continue
-                ci=random.choice(sc.effector_colors)
+                ci=rnd.choice(sc.effector_colors)
                 newcol=list(ci.color)[:3]
                 
                 o[prop]=base;   o.keyframe_insert(data_path=f'["{prop}"]',frame=f)
                 o[prop]=newcol; o.keyframe_insert(data_path=f'["{prop}"]',frame=f+trans)
                 o[prop]=base;   o.keyframe_insert(data_path=f'["{prop}"]',frame=f+2*trans)
                 cooldowns[o.name]=f+2*trans+1
-        return{'FINISHED'}
+                events.append((f, index[o.name], trans, *newcol))
+        ev = np.array(events, dtype=np.float64).reshape(-1, 6)
+        return ev[:, 0].astype(np.int64), ev[:, 1].astype(np.int64), ev[:, 2].astype(np.int64), ev[:, 3:]
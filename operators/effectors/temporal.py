@@ -1,10 +1,16 @@
 import bpy
 import random
+import numpy as np
+from bpy.props import BoolProperty
 from ... import utils
+from .schedule import drone_order, store_schedule, write_schedule
+from lightingmod_core import sparkle
 
 class LIGHTINGMOD_OT_temporal_sparkle(bpy.types.Operator):
     bl_idname = "lightingmod.temporal_sparkle"
     bl_label = "Temporal Sparkle"
+    dry_run: BoolProperty(name="Dry Run", default=False, options={'SKIP_SAVE'},
+                          description="Report sparkle counts and density per stage without keying anything")
     
     def execute(self, context):
         sc = context.scene
@@ -25,14 +31,57 @@ class LIGHTINGMOD_OT_temporal_sparkle(bpy.types.Operator):
         else:
              drones = [o for o in context.selected_objects if o.get("md_sphere") and o.type=='MESH']
 
+        drones = drone_order(drones)
+        seed = sc.effector_seed
+        if sc.effector_engine == 'PYTHON' and not self.dry_run:
+            events = self.run_per_key(sc, stages, drones, prop)
+            store_schedule(sc, 'TEMPORAL', prop, seed, drones, *events)
+            return {'FINISHED'}
+
+        # Stages compiled once into per-frame arrays, the whole schedule drawn at once
+        # Counts use every gathered drone; those without the layer are drawn but never keyed
+        active = np.array([prop in o.keys() for o in drones], dtype=bool)
+        timeline = sparkle.compile_stages([s.transition for s in stages], [s.influence for s in stages],
+                                          [[list(c.color)[:3] for c in s.colors] for s in stages], start, end)
+        frames, who, trans, colors = sparkle.schedule_stages(timeline, len(drones), np.random.default_rng(seed), active)
+        if self.dry_run:
+            self.report_stages(stages, timeline, frames, len(drones), seed)
+            return {'FINISHED'}
+
+        store_schedule(sc, 'TEMPORAL', prop, seed, drones, frames, who, trans, colors)
+        write_schedule(drones, prop, frames, who, trans, colors)
+        self.report({'INFO'}, f"{len(frames)} sparkles on {len(drones)} drones (seed {seed})")
+        return {'FINISHED'}
+
+    def report_stages(self, stages, timeline, frames, total, seed):
+        """Prints events and density per stage segment; density is the share of drones lit per frame."""
+        seg = timeline['stage'][frames - timeline['frames'][0]] if len(frames) else frames
+        n_frames = np.bincount(timeline['stage'], minlength=len(stages) - 1)
+        n_events = np.bincount(seg, minlength=len(stages) - 1)
+        for i, (nf, ne) in enumerate(zip(n_frames, n_events)):
+            if not nf: continue
+            density = ne / (nf * max(1, total))
+            print(f"{stages[i].name} -> {stages[i+1].name}: {ne} events over {nf} frames "
+                  f"({ne / nf:.2f}/frame, {density:.1%} of drones)")
+        self.report({'INFO'}, f"Dry run: {len(frames)} sparkles on {total} drones over "
+                              f"{len(timeline['frames'])} frames (seed {seed}); see console")
+
+    def run_per_key(self, sc, stages, drones, prop):
+        """
+        Reference implementation: stage blend, random.sample and
+        keyframe_insert per frame. Returns the events as (frames, drones,
+        trans, colors).
+        """
+        start, end = sc.effector_start, sc.effector_end
         total = len(drones)
         cooldowns = {}
+        rnd = random.Random(sc.effector_seed)
+        index = {o.name: i for i, o in enumerate(drones)}; events = []
 
         def interp(a, b, t): return a*(1-t) + b*t
-        def smoothstep(x): return x * x * (3 - 2 * x)
 
         for f in range(start, end + 1):
-            progress = smoothstep((f - start) / max(1, end - start))
+            progress = sparkle.smoothstep((f - start) / max(1, end - start))
             # Find active stage segment
             idx = min(len(stages) - 2, int(progress * (len(stages) - 1)))
             alpha = (progress * (len(stages) - 1)) - idx
@@ -61,11 +110,11 @@ class LIGHTINGMOD_OT_temporal_sparkle(bpy.types.Operator):
             elig = [o for o in drones if f >= cooldowns.get(o.name, start)]
             if not elig: continue
             
-            chosen = random.sample(elig, min(count, len(elig)))
+            chosen = rnd.sample(elig, min(count, len(elig)))
             for o in chosen:
                 if prop not in o.keys(): continue
                 base = o[prop][:]
-                newcol = random.choice(pool)
+                newcol = rnd.choice(pool)
                 
                 # Keyframe: Base -> Color -> Base
                 o[prop]=base;   o.keyframe_insert(data_path=f'["{prop}"]', frame=f)
@@ -73,8 +122,10 @@ class LIGHTINGMOD_OT_temporal_sparkle(bpy.types.Operator):
                 o[prop]=base;   o.keyframe_insert(data_path=f'["{prop}"]', frame=f+2*int(trans))
                 
                 cooldowns[o.name] = f + 2*int(trans) + 1
-                
-        return {'FINISHED'}
+                events.append((f, index[o.name], int(trans), *newcol[:3]))
+
+        ev = np.array(events, dtype=np.float64).reshape(-1, 6)
+        return ev[:, 0].astype(np.int64), ev[:, 1].astype(np.int64), ev[:, 2].astype(np.int64), ev[:, 3:]
 
 class LIGHTINGMOD_OT_stage_add(bpy.types.Operator):
     bl_idname = "lightingmod.stage_add"
@@ -1,6 +1,6 @@
 import bpy
 from bpy.props import IntProperty
-from .. import utils
+from .. import registry, utils
 
 class LIGHTINGMOD_OT_layer_add(bpy.types.Operator):
     bl_idname = "lightingmod.layer_add"
@@ -31,13 +31,12 @@ class LIGHTINGMOD_OT_layer_add(bpy.types.Operator):
             links.new(a0.outputs['Color'], em.inputs['Color'])
             
         prop = f"Layer_{idx+1}"
-        for obj in bpy.data.objects:
-            if obj.get("md_sphere") and obj.type=='MESH':
-                if mat.name not in {m.name for m in obj.data.materials}:
-                    obj.data.materials.append(mat)
-                obj[prop] = [0.5,0.5,0.5]
-                ui = obj.id_properties_ui(prop)
-                ui.update(min=0, max=1, subtype='COLOR')
+        for obj in registry.drones.all():
+            if mat.name not in {m.name for m in obj.data.materials}:
+                obj.data.materials.append(mat)
+            obj[prop] = [0.5,0.5,0.5]
+            ui = obj.id_properties_ui(prop)
+            ui.update(min=0, max=1, subtype='COLOR')
         
         if idx > 0:
             oldlink = em.inputs['Color'].links[0]
@@ -69,7 +68,7 @@ class LIGHTINGMOD_OT_layer_remove(bpy.types.Operator):
         sc = context.scene; idx = sc.ly_layers_index
         if idx == 0: return {'CANCELLED'}
         prop = f"Layer_{idx+1}"
-        for obj in bpy.data.objects:
+        for obj in registry.drones.all():
             if prop in obj.keys(): del obj[prop]
         mat = bpy.data.materials.get("drone colour")
         if mat:
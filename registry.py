@@ -0,0 +1,133 @@
+"""
+Cached index of the show's drones, so operators don't scan every object
+in the file on each click.
+
+Drones are the meshes with an md_sphere ID; their targets are the objects
+with an md_empty ID. The index is rebuilt on first use after anything
+that can add, remove or rename them: a change in the object count, file
+load, undo/redo, or a depsgraph update of an object the index files under
+another name or ID. Deleting an object sends no update, so lookups check
+that what they return still exists and rebuild once if not. Setting
+md_sphere/md_empty on an existing object from a script does not trigger a
+depsgraph update; call drones.invalidate() after such edits.
+"""
+import bpy
+from bpy.app.handlers import persistent
+
+METADATA_SPHERE = "md_sphere"
+METADATA_EMPTY = "md_empty"
+
+def is_drone(o):
+    return bool(o.get(METADATA_SPHERE)) and o.type == 'MESH'
+
+def _alive(o):
+    """False for an object reference whose object has been deleted."""
+    try:
+        o.name
+        return True
+    except ReferenceError:
+        return False
+
+class DroneRegistry:
+    def __init__(self):
+        self._valid = False
+        self._count = -1
+        self._by_name = {}
+        self._by_sphere = {}
+        self._by_empty = {}
+
+    def invalidate(self):
+        self._valid = False
+
+    def _ensure(self):
+        n = len(bpy.data.objects)
+        if self._valid and n == self._count: return
+        by_name, by_sphere, by_empty = {}, {}, {}
+        for o in bpy.data.objects:
+            if is_drone(o):
+                by_name[o.name] = o
+                by_sphere[o[METADATA_SPHERE]] = o
+            elif METADATA_EMPTY in o:
+                by_empty[o[METADATA_EMPTY]] = o
+        self._by_name, self._by_sphere, self._by_empty = by_name, by_sphere, by_empty
+        self._count = n
+        self._valid = True
+
+    def _lookup(self, table, key):
+        # Deleting one object and adding another keeps the count; catch the dead entry here
+        self._ensure()
+        o = getattr(self, table).get(key)
+        if o is not None and not _alive(o):
+            self.invalidate()
+            self._ensure()
+            o = getattr(self, table).get(key)
+        return o
+
+    def all(self):
+        """Every drone mesh, in bpy.data.objects order."""
+        self._ensure()
+        if not all(map(_alive, self._by_name.values())):
+            self.invalidate()
+            self._ensure()
+        return list(self._by_name.values())
+
+    def names(self):
+        self.all()
+        return list(self._by_name)
+
+    def get(self, name):
+        """Drone mesh called `name`, or None."""
+        return self._lookup('_by_name', name)
+
+    def sphere(self, sphere_id):
+        """Drone mesh with the given md_sphere ID, or None."""
+        return self._lookup('_by_sphere', sphere_id)
+
+    def empty(self, empty_id):
+        """Object with the given md_empty ID, or None."""
+        return self._lookup('_by_empty', empty_id)
+
+    def __len__(self):
+        return len(self.all())
+
+    def __contains__(self, name):
+        return self._lookup('_by_name', name) is not None
+
+    def _stale(self, o):
+        """True if `o` is not filed the way its current name and IDs say."""
+        if is_drone(o):
+            return self._by_name.get(o.name) != o or self._by_sphere.get(o[METADATA_SPHERE]) != o
+        if o.name in self._by_name: return True
+        return METADATA_EMPTY in o and self._by_empty.get(o[METADATA_EMPTY]) != o
+
+drones = DroneRegistry()
+
+@persistent
+def _on_depsgraph_update(scene, depsgraph):
+    if not drones._valid or not depsgraph.id_type_updated('OBJECT'): return
+    for update in depsgraph.updates:
+        if isinstance(update.id, bpy.types.Object) and drones._stale(update.id.original):
+            drones.invalidate()
+            return
+
+@persistent
+def _on_reload(*_):
+    # Object references do not survive file load or undo
+    drones.invalidate()
+
+_HANDLERS = (
+    ('depsgraph_update_post', _on_depsgraph_update),
+    ('load_post', _on_reload),
+    ('undo_post', _on_reload),
+    ('redo_post', _on_reload),
+)
+
+def register():
+    for name, fn in _HANDLERS:
+        getattr(bpy.app.handlers, name).append(fn)
+
+def unregister():
+    for name, fn in _HANDLERS:
+        handlers = getattr(bpy.app.handlers, name)
+        if fn in handlers: handlers.remove(fn)
+    drones.invalidate()
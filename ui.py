@@ -31,6 +31,15 @@ class LIGHTINGMOD_UL_temporal_stages(bpy.types.UIList):
         layout.prop(item, "name", text="", emboss=False, icon='TIME')
 
 
+def draw_schedule_replay(box, sc, kind):
+    """Seed field, plus Replay with a frame shift once a schedule is stored."""
+    box.prop(sc, "effector_seed")
+    if not sc.get("lm_effector_schedules", {}).get(kind): return
+    row = box.row(align=True)
+    row.prop(sc, "effector_replay_shift")
+    op = row.operator("lightingmod.replay_schedule", icon='FILE_REFRESH', text="Replay")
+    op.kind = kind; op.shift = sc.effector_replay_shift
+
 class LIGHTINGMOD_PT_panel(bpy.types.Panel):
     bl_label="Advanced Lighting"; bl_space_type='VIEW_3D'; bl_region_type='UI'; bl_category="Advanced Lighting"
 
@@ -82,6 +91,8 @@ class LIGHTINGMOD_PT_panel(bpy.types.Panel):
         if tp=='SPARKLE':
             box.prop(sc,"effector_transition",text="Transition")
             box.prop(sc,"effector_influence",text="Influence")
+            box.prop(sc,"effector_engine",text="Engine")
+            draw_schedule_replay(box, sc, 'SPARKLE')
             box.template_list("LIGHTINGMOD_UL_effector_colors","",sc,"effector_colors",sc,"effector_colors_index",rows=3)
             row=box.row(align=True)
             row.operator("lightingmod.effector_color_add",icon='ADD',text=""); row.operator("lightingmod.effector_color_remove",icon='REMOVE',text="")
@@ -99,6 +110,9 @@ class LIGHTINGMOD_PT_panel(bpy.types.Panel):
                 row=box.row(align=True)
                 op=row.operator("lightingmod.effector_color_add",icon='ADD',text=""); op.target='TEMPORAL_STAGE'
                 op=row.operator("lightingmod.effector_color_remove",icon='REMOVE',text=""); op.target='TEMPORAL_STAGE'
+            box.prop(sc,"effector_engine",text="Engine")
+            op=box.operator("lightingmod.temporal_sparkle",text="Dry Run",icon='INFO'); op.dry_run=True
+            draw_schedule_replay(box, sc, 'TEMPORAL')
 
         elif tp in {'GRADIENT', 'OFFSET'}:
             box.prop(sc, "gradient_mode", text="Mode")
@@ -119,7 +133,9 @@ class LIGHTINGMOD_PT_panel(bpy.types.Panel):
                 if sc.gradient_mode != 'CURVE': box.operator("lightingmod.draw_offset_line", icon='BRUSH_DATA', text="Draw Offset Line")
 
         if tp=='DOMAIN':
-            box.prop(sc,"domain_object"); box.template_list("LIGHTINGMOD_UL_effector_colors","",sc,"effector_colors",sc,"effector_colors_index",rows=3)
+            box.prop(sc,"domain_object"); box.prop(sc,"domain_mode")
+            if sc.domain_mode=='MESH': box.prop(sc,"domain_resolution")
+            box.prop(sc,"domain_falloff"); box.template_list("LIGHTINGMOD_UL_effector_colors","",sc,"effector_colors",sc,"effector_colors_index",rows=3)
             row=box.row(align=True); row.operator("lightingmod.effector_color_add",icon='ADD',text=""); row.operator("lightingmod.effector_color_remove",icon='REMOVE',text="")
 
         elif tp=='MOVIE':
@@ -129,6 +145,31 @@ class LIGHTINGMOD_PT_panel(bpy.types.Panel):
         box.operator("lightingmod.apply_effectors", text="Apply")
 
 
+class LIGHTINGMOD_PT_bake(bpy.types.Panel):
+    bl_label="Bake"; bl_space_type='VIEW_3D'; bl_region_type='UI'; bl_category="Advanced Lighting"
+    def draw(self, context):
+        sc=context.scene; layout=self.layout
+        layout.prop(sc,"bake_engine",text="Engine")
+        if sc.bake_engine == 'PROCESS': layout.prop(sc,"bake_workers")
+        if sc.bake_engine == 'NUMPY': layout.prop(sc,"bake_chunk_frames")
+        layout.prop(sc,"bake_compression",text="Compression")
+        layout.prop(sc,"bake_incremental")
+        layout.prop(sc,"bake_write_profile")
+        layout.prop(sc,"bake_use_window")
+        if sc.bake_use_window:
+            row=layout.row(align=True)
+            row.prop(sc,"bake_window_start",text="Start")
+            row.prop(sc,"bake_window_end",  text="End")
+        layout.prop(sc,"bake_group_only")
+        p=utils.bake_progress
+        if p:
+            box=layout.box()
+            box.label(text=f"{p['label']}: {p['done']}/{p['total']}",icon='TIME')
+            eta=f"{p['eta']:.0f}s" if p['eta'] is not None else "--"
+            box.label(text=f"{p['rate']:.1f}/s, ETA {eta}  (ESC to cancel)")
+        else:
+            layout.operator("lightingmod.bake_colors",icon='RENDER_STILL',text="Bake")
+
 class LIGHTINGMOD_PT_drone_groups(bpy.types.Panel):
     bl_label="Formations & Groups"; bl_space_type='VIEW_3D'; bl_region_type='UI'; bl_category="Advanced Lighting"
     
@@ -166,6 +207,9 @@ class LIGHTINGMOD_PT_export(bpy.types.Panel):
         sc=context.scene; layout=self.layout
         layout.prop(sc,"export_folder",text="CSV Folder")
         layout.prop(sc, "export_filename", text="Filename") # <--- NEW FIELD
+        layout.prop(sc, "export_format")
+        if sc.export_format == 'JSON': layout.prop(sc, "export_compression")
+        layout.prop(sc, "export_workers")
         
         col = layout.column(align=True)
         col.operator("lightingmod.export_csv_colors", text="Overwrite CSV Colors", icon='FILE_TEXT')
@@ -174,7 +218,7 @@ class LIGHTINGMOD_PT_export(bpy.types.Panel):
 classes = (
     LIGHTINGMOD_UL_layers, LIGHTINGMOD_UL_effector_colors,
     LIGHTINGMOD_UL_formations, LIGHTINGMOD_UL_groups, LIGHTINGMOD_UL_group_drones, LIGHTINGMOD_UL_temporal_stages,
-    LIGHTINGMOD_PT_panel, LIGHTINGMOD_PT_drone_groups, LIGHTINGMOD_PT_export,
+    LIGHTINGMOD_PT_panel, LIGHTINGMOD_PT_bake, LIGHTINGMOD_PT_drone_groups, LIGHTINGMOD_PT_export,
 )
 
 def register():
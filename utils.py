@@ -1,9 +1,14 @@
 import bpy
 import re
+from lightingmod_core.store import BakedColorStore
 
 # --- Globals ---
 last_batch_history = {}
-baked_colors = {}
+baked_colors = BakedColorStore()
+# Progress of the running modal bake (label, done, total, rate, eta); empty when idle
+bake_progress = {}
+# Counters of the last finished bake (see the bake profile), for scripts and benchmarks
+last_bake_counters = {}
 
 BLEND_MAP = {
     'REPLACE':'COLOR','MIX':'MIX','ADD':'ADD','SUBTRACT':'SUBTRACT',